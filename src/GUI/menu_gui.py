@@ -37,6 +37,9 @@ class Menu:
             "Minimax-1",
             "Minimax-2",
             "Minimax-3",
+            "Pattern",
+            "Trained",
+            "Tuned",
             "Simulated Annealing",
             "Genetic Algorithm"
         ]
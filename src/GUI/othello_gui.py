@@ -200,7 +200,7 @@ class OthelloGUI:
             if self.game.player_mode == "ai" and self.game.current_player == -1:
                 end_time = time.time()
                 elapsed_time = end_time - start_time
-                self.message = "AI is thinking...\ntime running "+elapsed_time+" s"
+                self.message = "AI is thinking...\ntime running "+str(elapsed_time)+" s"
 
                 self.draw_board()  # Display the thinking message
                 ai_move = bot_1.get_best_move(self.game, ai_1)
@@ -209,12 +209,18 @@ class OthelloGUI:
                 # Check if ai_move is valid (i.e., not None)
                 if ai_move is not None:
                     self.game.make_move(*ai_move)
+                    if hasattr(bot_1, "start_pondering"):
+                        bot_1.start_pondering(self.game)  # search on the human's time
                 else:
                     self.message = "AI cannot make a move!"
 
           self.message = ""  # Clear any previous messages
           self.draw_board()
 
+      for bot in (bot_1, bot_2):
+          if hasattr(bot, "close"):
+              bot.close()
+
       winner = self.game.get_winner()
       if winner == 1:
           self.message = ai_1+" black wins!" if ai_1 is not None and ai_2 is not None else "black wins!"
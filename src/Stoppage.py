@@ -4,8 +4,17 @@ class Stoppage:
     stop = False
     move = False
 
-    def __init__(self) -> None:
-        pass
+    def __init__(self, deadline=None, check_every=64) -> None:
+        """
+        Stop flag shared with a running search.
+
+        Args:
+            deadline (float): Optional ``time.monotonic()`` value after which ``isStop`` turns True.
+            check_every (int): Number of ``isStop`` calls between two clock reads.
+        """
+        self.deadline = deadline
+        self.check_every = check_every
+        self.countdown = check_every
 
     def startCount(self):
         time.sleep(5)
@@ -13,6 +22,12 @@ class Stoppage:
 
 
     def isStop(self):
+        if self.deadline is not None and not self.stop:
+            self.countdown -= 1
+            if self.countdown <= 0:
+                self.countdown = self.check_every
+                if time.monotonic() >= self.deadline:
+                    self.stop = True
         return self.stop or self.move 
 
-    
\ No newline at end of file
+    
@@ -1,11 +1,448 @@
-from othello_game import OthelloGame
+from bitboard import legal_moves, popcount
 from Stoppage import Stoppage
+from endgame import EndgameSolver
+from stability import stable_disc_difference
+from parallel_search import TIE_MARGIN, LazySMPSearch, RootSplitSearch
+from opening_book import OPENING_BOOK_PATH, OpeningBook
+from patterns import PATTERN_WEIGHTS_PATH, PatternEvaluator, phase_of
+from position_cache import PositionCache
+from probcut import MPC_PARAMS_PATH, load_mpc_params
+from search_stats import SearchStats, make_sink
+from training import EVALUATION_WEIGHTS_PATH, load_evaluation_weights
+from transposition import EXACT, LOWER, UPPER, SharedTranspositionTable, TranspositionTable
 import threading
+import time
+
+# XORed into the key of minimizing nodes so max and min results never share an entry.
+MIN_NODE_KEY = 0x9E3779B97F4A7C15
+
+MAX_PLY = 64
+
+# Static move priority per square (row-major): corners first, X- and C-squares last.
+SQUARE_PRIORITY = [
+    100, -20, 10,  5,  5, 10, -20, 100,
+    -20, -50, -2, -2, -2, -2, -50, -20,
+     10,  -2,  1,  1,  1,  1,  -2,  10,
+      5,  -2,  1,  0,  0,  1,  -2,   5,
+      5,  -2,  1,  0,  0,  1,  -2,   5,
+     10,  -2,  1,  1,  1,  1,  -2,  10,
+    -20, -50, -2, -2, -2, -2, -50, -20,
+    100, -20, 10,  5,  5, 10, -20, 100,
+]
+
+DEFAULT_ORDERING = {"hash": True, "killer": True, "history": True, "static": True}
+
+SEARCH_ALGORITHMS = ("alphabeta", "pvs")
+PARALLEL_MODES = ("root", "lazy_smp")
+# Width of the zero window used by PVS. Any window narrower than the score granularity works.
+NULL_WINDOW = 1e-6
+# Fraction of the time budget the endgame solver may use before falling back to the heuristic search.
+ENDGAME_TIME_SHARE = 0.75
+# Weights of an evaluation parameter set, in the order ``evaluation_features`` returns the features.
+EVALUATION_FEATURES = (
+    "coin_parity_weight",
+    "mobility_weight",
+    "corner_occupancy_weight",
+    "stability_weight",
+    "edge_occupancy_weight",
+)
+# Late move reductions: (first move index, plies) pairs. Moves from the 4th on lose one ply, from the 9th on two.
+DEFAULT_REDUCTIONS = ((3, 1), (8, 2))
 
 class ai_agent:
 
-    def __init__(self) -> None:
-        pass
+    def __init__(self, tt_size_mb=16, ordering=None, algorithm="alphabeta", aspiration_window=8.0,
+                 endgame_empties=12, wld_empties=14, workers=1, parallel="root", stats_sink=None, probcut=False,
+                 probcut_file=MPC_PARAMS_PATH, late_move_reductions=False, reduction_schedule=DEFAULT_REDUCTIONS,
+                 reduction_min_depth=3, opening_book=OPENING_BOOK_PATH, position_cache=None, cache_store_depth=6,
+                 evaluation_weights=EVALUATION_WEIGHTS_PATH) -> None:
+        """
+        Parameters:
+            tt_size_mb (float): Approximate size of the transposition table in megabytes.
+            ordering (dict): Move-ordering stages to switch on or off, any of "hash", "killer", "history" and
+                "static" (all on by default).
+            algorithm (str): "alphabeta" for the max/min Alpha-Beta search or "pvs" for negamax principal
+                variation search with aspiration windows.
+            aspiration_window (float): Initial half-width of the PVS root window around the previous score.
+            endgame_empties (int): Solve the position exactly (final disc difference) from this many empty
+                squares on.
+            wld_empties (int): Solve the position for win/loss/draw from this many empty squares on.
+            workers (int): Number of processes searching in parallel (see ``parallel_search``). With more than
+                one, ``close()`` should be called when done.
+            parallel (str): "root" to split the root moves across the workers, or "lazy_smp" to let every
+                worker search the whole root and share one transposition table in shared memory.
+            stats_sink (str or file): JSON-lines file (a path or an open text file) that receives the SearchStats of
+                every ``get_best_move`` call.
+            probcut (bool): True to forward-prune with Multi-ProbCut (see ``probcut.py``) at the depths that have
+                parameters for the evaluation parameter set in use.
+            probcut_file (str): The Multi-ProbCut parameter file.
+            late_move_reductions (bool): True to search late moves (see ``reduction_schedule``) of non-root nodes with
+                a reduced-depth null window first, and to full depth only if they beat the bound.
+            reduction_schedule (tuple): ``(first_move_index, plies)`` pairs: moves at or after that position in the
+                ordered move list are reduced by that many plies.
+            reduction_min_depth (int): Only nodes with at least this remaining depth reduce their late moves.
+            opening_book (str): Opening book file (see ``opening_book.py``) consulted before searching with the
+                parameter set it was built for, or None to always search.
+            position_cache (str or PositionCache): Persistent cache of root results shared across games and processes
+                (see ``position_cache.py``): a database path, an open cache, or None for no cache.
+            cache_store_depth (int): Heuristic searches reaching at least this depth are saved in the cache; endgame
+                solutions always are.
+            evaluation_weights (str): File of trained per-phase parameter sets (see ``training.py``) added to
+                ``evaluation_params``, or None for the built-in sets only.
+        """
+        if algorithm not in SEARCH_ALGORITHMS:
+            raise ValueError(f"algorithm must be one of {SEARCH_ALGORITHMS}, got {algorithm!r}")
+        if parallel not in PARALLEL_MODES:
+            raise ValueError(f"parallel must be one of {PARALLEL_MODES}, got {parallel!r}")
+        self.algorithm = algorithm
+        self.aspiration_window = aspiration_window
+        self.endgame_empties = endgame_empties
+        self.wld_empties = wld_empties
+        self.stats_sink = make_sink(stats_sink)
+        if evaluation_weights is not None:
+            self.evaluation_params = dict(ai_agent.evaluation_params, **load_evaluation_weights(evaluation_weights))
+        self.mpc_threshold, self.mpc_params = load_mpc_params(probcut_file) if probcut else (None, None)
+        self.reduction_min_depth = reduction_min_depth
+        self.reduction_by_index = None
+        if late_move_reductions:
+            self.reduction_by_index = [0] * MAX_PLY
+            for first_index, plies in sorted(reduction_schedule):
+                self.reduction_by_index[first_index:] = [plies] * (MAX_PLY - first_index)
+        self.last_stats = None
+        self.book = OpeningBook(opening_book) if opening_book is not None else None
+        self.owns_cache = isinstance(position_cache, str)
+        self.cache = PositionCache(position_cache) if self.owns_cache else position_cache
+        self.cache_store_depth = cache_store_depth
+        self.last_params = None
+        self.pattern_evaluators = {}
+        self.search_params = None
+        self.search_player = None
+        self.search_ply = None
+        self.pv = []
+        self.pv_expected_hash = None
+        self.ponder_thread = None
+        self.ponder_position = None
+        self.ponder_stoppage = None
+        self.ponder_move = None
+        self.ponder_result = None
+        self.ponder_hits = 0
+        self.ponder_misses = 0
+        self.root_split = None
+        self.lazy_smp = None
+        worker_options = {
+            "tt_size_mb": tt_size_mb,
+            "ordering": ordering,
+            "algorithm": algorithm,
+            "probcut": probcut,
+            "probcut_file": probcut_file,
+            "late_move_reductions": late_move_reductions,
+            "reduction_schedule": reduction_schedule,
+            "reduction_min_depth": reduction_min_depth,
+            "evaluation_weights": evaluation_weights,
+        }
+        if workers > 1 and parallel == "lazy_smp":
+            self.tt = SharedTranspositionTable(tt_size_mb)
+            self.lazy_smp = LazySMPSearch(workers, dict(worker_options, tt_size_mb=0), self.tt.name)
+        else:
+            self.tt = TranspositionTable(tt_size_mb)
+            if workers > 1:
+                self.root_split = RootSplitSearch(workers, worker_options)
+        self.ordering = dict(DEFAULT_ORDERING, **(ordering or {}))
+        self.reset_ordering()
+        self.reset_counters()
+
+    def close(self):
+        """
+        Stop pondering, shut down the worker processes of the parallel search, if any, free the shared table and
+        close the statistics sink, the opening book and the position cache (if this agent opened it).
+        """
+        self.stop_pondering()
+        if self.stats_sink is not None:
+            self.stats_sink.close()
+        if self.book is not None:
+            self.book.close()
+        if self.owns_cache:
+            self.cache.close()
+        if self.root_split is not None:
+            self.root_split.close()
+        if self.lazy_smp is not None:
+            self.lazy_smp.close()
+            self.tt.close()
+
+    def reset_ordering(self):
+        """Clear the killer and history tables and the cutoff counters."""
+        self.killers = [[None, None] for _ in range(MAX_PLY + 1)]
+        self.history = [0] * 64
+        self.beta_cutoffs = 0
+        self.first_move_cutoffs = 0
+
+    def reset_counters(self):
+        """Zero the search counters (see ``search_counters``) and start the search clock."""
+        self.nodes = 0
+        self.leaf_evals = 0
+        self.expanded_nodes = 0
+        self.moves_generated = 0
+        self.movegen_seconds = 0.0
+        self.eval_seconds = 0.0
+        self.probcut_cuts = 0
+        self.book_hits = 0
+        self.cache_hits = 0
+        self.reduced_searches = {}
+        self.reduction_re_searches = {}
+        self.cutoffs_at_start = self.beta_cutoffs
+        self.worker_counters = {}
+        self.iterations = []
+        self.depth_reached = 0
+        self.tt.reset_stats()
+        self.search_start = time.perf_counter()
+
+    def search_counters(self):
+        """
+        Returns:
+            dict: The ``search_stats.COUNTER_NAMES`` counters of the current search, including those reported by
+            worker processes.
+        """
+        counters = {
+            "nodes": self.nodes,
+            "leaf_evals": self.leaf_evals,
+            "expanded_nodes": self.expanded_nodes,
+            "moves_generated": self.moves_generated,
+            "beta_cutoffs": self.beta_cutoffs - self.cutoffs_at_start,
+            "tt_probes": self.tt.probes,
+            "tt_hits": self.tt.hits,
+            "movegen_seconds": self.movegen_seconds,
+            "eval_seconds": self.eval_seconds,
+            "probcut_cuts": self.probcut_cuts,
+            "book_hits": self.book_hits,
+            "cache_hits": self.cache_hits,
+            "reduced_searches": sum(self.reduced_searches.values()),
+            "reduction_re_searches": sum(self.reduction_re_searches.values()),
+        }
+        for name, value in self.worker_counters.items():
+            counters[name] += value
+        return counters
+
+    def add_worker_counters(self, counters):
+        """Add the ``search_counters()`` of a worker process to this search's."""
+        for name, value in counters.items():
+            self.worker_counters[name] = self.worker_counters.get(name, 0) + value
+
+    def record_iteration(self, depth, score):
+        """Append a completed iteration, with the cumulative time and node count, to ``iterations``."""
+        self.iterations.append({
+            "depth": depth,
+            "seconds": time.perf_counter() - self.search_start,
+            "nodes": self.nodes + self.worker_counters.get("nodes", 0),
+            "score": score,
+        })
+
+    def report(self, move, ai_agent_name, return_stats):
+        """
+        Build the SearchStats of the search that chose ``move``, send it to the sink and return what
+        ``get_best_move`` returns.
+        """
+        stats = SearchStats(
+            "ai_agent",
+            ai_agent_name,
+            move,
+            self.depth_reached,
+            time.perf_counter() - self.search_start,
+            list(self.iterations),
+            **self.search_counters(),
+        )
+        self.last_stats = stats
+        if self.stats_sink is not None:
+            self.stats_sink.write(stats)
+        return (move, stats) if return_stats else move
+
+    def generate_moves(self, game):
+        """Return the valid moves of an interior node, timing the move generation."""
+        start = time.perf_counter()
+        valid_moves = game.get_valid_moves()
+        self.movegen_seconds += time.perf_counter() - start
+        if valid_moves:
+            self.expanded_nodes += 1
+            self.moves_generated += len(valid_moves)
+        return valid_moves
+
+    def leaf_value(self, game, ai_agent_name, color):
+        """
+        Evaluate a leaf with the ``ai_agent_name`` parameter set, timing the evaluation.
+
+        Parameters:
+            game (OthelloGame): The leaf position.
+            ai_agent_name (str): The evaluation parameter set.
+            color (int): 1 if the side to move is the root player, -1 otherwise.
+
+        Returns:
+            float: The leaf's score for the root player. ``evaluate_game_state`` scores the side to move, so the
+            score is negated at the opponent's nodes.
+        """
+        start = time.perf_counter()
+        value = color * self.evaluate_game_state(game, self.evaluation_params[ai_agent_name])
+        self.eval_seconds += time.perf_counter() - start
+        self.leaf_evals += 1
+        return value
+
+    def new_search(self, game, ai_agent_name):
+        """
+        Prepare the search tables for a new root position, keeping what earlier searches learned.
+
+        The transposition table moves to the new game ply (older entries stay usable but are replaced first),
+        the killer moves are shifted by the number of plies played since the last search and the history scores
+        are halved. Everything is cleared instead when the side to move, the evaluation parameter set or the
+        game changed.
+
+        Parameters:
+            game (OthelloGame): The new root position.
+            ai_agent_name (str): The evaluation parameter set.
+        """
+        ply = 60 - game.count_stones()[2]
+        elapsed = ply - self.search_ply if self.search_ply is not None else -1
+        if elapsed < 0 or self.search_player != game.current_player or self.search_params != ai_agent_name:
+            self.tt.clear()
+            self.reset_ordering()
+            self.pv = []
+            self.pv_expected_hash = None
+        else:
+            self.killers = self.killers[elapsed:] + [[None, None] for _ in range(min(elapsed, MAX_PLY + 1))]
+            self.history = [score >> 1 for score in self.history]
+            self.beta_cutoffs = 0
+            self.first_move_cutoffs = 0
+        self.track_patterns(game, ai_agent_name)
+        self.tt.new_search(ply)
+        self.tt.reset_stats()
+        self.search_ply = ply
+        self.search_player = game.current_player
+        self.search_params = ai_agent_name
+
+    def track_patterns(self, game, ai_agent_name):
+        """Make ``game`` maintain its pattern indices if the ``ai_agent_name`` parameter set is scored by patterns."""
+        if "pattern_weights" in self.evaluation_params[ai_agent_name]:
+            game.track_patterns()
+
+    def expected_first_move(self, game):
+        """
+        Returns:
+            tuple: The move the previous principal variation expects here, if ``game`` is the position it
+            predicted, otherwise None.
+        """
+        if self.pv_expected_hash == game.hash and len(self.pv) > 2 and game.is_valid_move(*self.pv[2]):
+            return self.pv[2]
+        return None
+
+    def update_principal_variation(self, game, max_length=MAX_PLY):
+        """
+        Rebuild ``self.pv`` by following best moves through the transposition table from ``game``, and remember
+        the position expected after its first two moves.
+
+        Parameters:
+            game (OthelloGame): The root position of the finished search. It is not modified.
+            max_length (int): The maximum number of moves to follow.
+        """
+        pv = []
+        expected_hash = None
+        line = game.copy()
+        maximizing = True
+        while len(pv) < max_length:
+            entry = self.tt.probe(line.hash if maximizing else line.hash ^ MIN_NODE_KEY)
+            if entry is None or entry[4] is None or line.make_move(*entry[4]) is None:
+                break
+            pv.append(entry[4])
+            maximizing = not maximizing
+            if len(pv) == 2:
+                expected_hash = line.hash
+        self.pv = pv
+        self.pv_expected_hash = expected_hash
+
+    def ordering_stats(self):
+        """
+        Returns:
+            dict: Number of beta cutoffs and the fraction of them caused by the first move searched.
+        """
+        return {
+            "beta_cutoffs": self.beta_cutoffs,
+            "first_move_cutoffs": self.first_move_cutoffs,
+            "first_move_cutoff_rate": self.first_move_cutoffs / self.beta_cutoffs if self.beta_cutoffs else 0.0,
+        }
+
+    def reduction_stats(self):
+        """
+        Returns:
+            dict: For each reduction (in plies) used by the current search, the number of reduced searches, how many
+            of them had to be searched again to full depth, and the re-search rate.
+        """
+        return {
+            plies: {
+                "searches": searches,
+                "re_searches": self.reduction_re_searches.get(plies, 0),
+                "re_search_rate": self.reduction_re_searches.get(plies, 0) / searches,
+            }
+            for plies, searches in sorted(self.reduced_searches.items())
+        }
+
+    def reduction(self, index, max_depth, ply):
+        """
+        Returns:
+            int: How many plies to reduce the ``index``-th move of a node by (0 for a full-depth search).
+        """
+        if self.reduction_by_index is None or ply == 0 or max_depth < self.reduction_min_depth:
+            return 0
+        return max(0, min(self.reduction_by_index[index], max_depth - 2))
+
+    def reduction_failed(self, plies, failed):
+        """Count a reduced search and whether it beat the bound (and so needs a full-depth re-search)."""
+        self.reduced_searches[plies] = self.reduced_searches.get(plies, 0) + 1
+        if failed:
+            self.reduction_re_searches[plies] = self.reduction_re_searches.get(plies, 0) + 1
+        return failed
+
+    def order_moves(self, moves, tt_move, ply):
+        """
+        Sort moves in place: hash move, then killer moves of this ply, then by history score, then by static
+        square priority. Disabled stages are skipped.
+
+        Parameters:
+            moves (list): The valid moves as (row, col) tuples.
+            tt_move (tuple): The best move stored in the transposition table, if any.
+            ply (int): Distance from the root.
+        """
+        ordering = self.ordering
+        if not ordering["hash"]:
+            tt_move = None
+        killer_1, killer_2 = self.killers[ply] if ordering["killer"] else (None, None)
+        history = self.history if ordering["history"] else None
+        static = ordering["static"]
+
+        def priority(move):
+            square = move[0] * 8 + move[1]
+            return (
+                move == tt_move,
+                2 if move == killer_1 else (1 if move == killer_2 else 0),
+                history[square] if history is not None else 0,
+                SQUARE_PRIORITY[square] if static else 0,
+            )
+
+        moves.sort(key=priority, reverse=True)
+
+    def record_cutoff(self, move, index, depth, ply):
+        """
+        Update the killer and history tables after ``move`` caused a beta cutoff.
+
+        Parameters:
+            move (tuple): The move that caused the cutoff.
+            index (int): Its position in the ordered move list.
+            depth (int): The remaining depth of the node.
+            ply (int): Distance from the root.
+        """
+        self.beta_cutoffs += 1
+        if index == 0:
+            self.first_move_cutoffs += 1
+        killers = self.killers[ply]
+        if killers[0] != move:
+            killers[1] = killers[0]
+            killers[0] = move
+        self.history[move[0] * 8 + move[1]] += depth * depth
 
     evaluation_params = {
         "Minimax-1" : {
@@ -28,31 +465,503 @@ class ai_agent:
             "stability_weight": 2.5,
             "corner_occupancy_weight" : 5.0,
             "edge_occupancy_weight" : 2.5
+        },
+        # Scored by pattern tables (see patterns.py) instead of the weighted features.
+        "Pattern" : {
+            "pattern_weights" : PATTERN_WEIGHTS_PATH
         }
     }
 
-    def get_best_move(self, game, ai_agent_name ,max_depth=8):
+    def get_best_move(self, game, ai_agent_name, max_depth=60, time_budget=5.0, return_stats=False):
         """
-        Given the current game state, this function returns the best move for the AI player using the Alpha-Beta Pruning
-        algorithm with a specified maximum search depth.
+        Given the current game state, this function returns the best move for the AI player using iterative
+        deepening Alpha-Beta Pruning: depth 1, 2, ... are searched until ``max_depth`` or until the time budget
+        runs out. Positions in the opening book are answered from it without searching if the book was built with
+        ``ai_agent_name``. If a ponder search (see ``start_pondering``) is running on this exact position it is
+        continued instead; otherwise it is cancelled.
 
         Parameters:
             game (OthelloGame): The current game state.
             max_depth (int): The maximum search depth for the Alpha-Beta algorithm.
+            time_budget (float): Seconds available for the whole search.
+            return_stats (bool): True to also return the search's SearchStats.
 
         Returns:
-            tuple: A tuple containing the evaluation value of the best move and the corresponding move (row, col).
+            tuple: The best move (row, col) of the last completed iteration, or of the interrupted iteration if it
+            had already searched the previous best move. None if there is no valid move. With ``return_stats``,
+            a ``(move, SearchStats)`` pair; the stats are also kept in ``last_stats``.
         """
-        
-        stoppage = Stoppage()
-        thread = threading.Thread(target=stoppage.startCount)
+        valid_moves = game.get_valid_moves()
+        if len(valid_moves) <= 1:
+            self.stop_pondering()
+            self.reset_counters()
+            return self.report(valid_moves[0] if valid_moves else None, ai_agent_name, return_stats)
+
+        if self.book is not None and self.book.name == ai_agent_name:
+            move = self.book.probe(game)
+            if move is not None:
+                self.stop_pondering()
+                self.reset_counters()
+                self.book_hits = 1
+                return self.report(move, ai_agent_name, return_stats)
+        self.last_params = ai_agent_name
+
+        if self.ponder_thread is not None:
+            if self.ponder_position == (game.black_bits, game.white_bits, game.current_player, game.hash):
+                # Ponder hit: let the running search go on for the normal time budget and use its result.
+                self.ponder_hits += 1
+                self.ponder_stoppage.deadline = time.monotonic() + time_budget
+                self.ponder_thread.join()
+                self.ponder_thread = None
+                if self.ponder_result is not None:
+                    return self.report(self.ponder_result, ai_agent_name, return_stats)
+            else:
+                self.ponder_misses += 1
+                self.stop_pondering()
+
+        stoppage = Stoppage(deadline=time.monotonic() + time_budget)
+        move = self.search_position(game, ai_agent_name, max_depth, stoppage, time_budget)
+        return self.report(move, ai_agent_name, return_stats)
+
+    def search_position(self, game, ai_agent_name, max_depth, stoppage, time_budget=None, use_workers=True):
+        """
+        Age the search tables (see ``new_search``) and find the best move of a position with the endgame solver
+        or iterative deepening, whichever applies. The search starts from the move the previous principal
+        variation expected, if any. With a position cache, a cached endgame solution is returned as is, and a
+        cached heuristic result lets iterative deepening resume one ply deeper than the cached depth.
+
+        Parameters:
+            game (OthelloGame): The current game state; it must have at least two valid moves.
+            max_depth (int): The maximum search depth.
+            stoppage (Stoppage): The search's stop flag.
+            time_budget (float): The budget behind ``stoppage.deadline``, used to give the endgame solver its
+                share. None when the search runs until stopped.
+            use_workers (bool): False to search in this process only, even if workers are configured.
+
+        Returns:
+            tuple: The best move (row, col).
+        """
+        first_move = self.expected_first_move(game)
+        self.new_search(game, ai_agent_name)
+        self.reset_counters()
+        empties = game.count_stones()[2]
 
-        thread.start()
-        _, best_move = self.alphabeta(game ,max_depth, stoppage, ai_agent_name)
+        if empties <= max(self.endgame_empties, self.wld_empties):
+            # The solver gets most of the budget; if it runs out the heuristic search below uses the rest.
+            solver_stoppage = stoppage
+            if time_budget is not None:
+                solver_stoppage = Stoppage(deadline=stoppage.deadline - time_budget * (1 - ENDGAME_TIME_SHARE))
+            exact = empties <= self.endgame_empties
+            score, move = self.probe_cache_endgame(game, exact)
+            if move is None:
+                solver = EndgameSolver(solver_stoppage)
+                score, move = solver.solve_root(game, exact=exact)
+                self.nodes += solver.nodes
+                if move is not None and self.cache is not None:
+                    self.cache.store(game.hash, "exact" if exact else "wld", empties, score, move)
+            if move is not None:
+                self.depth_reached = empties
+                self.record_iteration(empties, score)
+                self.pv = [move]
+                self.pv_expected_hash = None
+                return move
+
+        first_depth = 1
+        cached = None
+        if self.cache is not None:
+            cached = self.cache.probe(game.hash, ai_agent_name)
+            if cached is not None and cached[3] in game.get_valid_moves():
+                self.cache_hits += 1
+                cached_depth, _, cached_score, first_move = cached
+                if cached_depth >= max_depth:
+                    self.depth_reached = cached_depth
+                    self.record_iteration(cached_depth, cached_score)
+                    return first_move
+                first_depth = cached_depth + 1
+            else:
+                cached = None
+
+        if self.root_split is not None:
+            self.root_split.new_search()
+        if self.lazy_smp is not None and use_workers:
+            score, best_move, self.depth_reached = self.lazy_smp.search(
+                self, game, ai_agent_name, max_depth, stoppage, first_move, first_depth
+            )
+        else:
+            score, best_move, self.depth_reached = self.iterative_deepening(
+                game, ai_agent_name, max_depth, stoppage, first_depth, use_workers, first_move
+            )
+        if cached is not None and self.depth_reached < cached[0]:
+            # Nothing deeper than the cached result finished: keep the cached move.
+            self.depth_reached, _, score, best_move = cached
+            self.record_iteration(self.depth_reached, score)
+        elif self.cache is not None and self.depth_reached >= self.cache_store_depth:
+            self.cache.store(game.hash, ai_agent_name, self.depth_reached, score, best_move)
+        self.update_principal_variation(game, max(self.depth_reached, 2))
         return best_move
 
+    def probe_cache_endgame(self, game, exact):
+        """
+        Look up an endgame solution in the position cache. A win/loss/draw search is also answered by an exact
+        solution.
+
+        Returns:
+            tuple: ``(score, move)``, or ``(None, None)`` on a miss.
+        """
+        if self.cache is None:
+            return None, None
+        for kind in ("exact",) if exact else ("exact", "wld"):
+            entry = self.cache.probe(game.hash, kind)
+            if entry is not None and entry[3] in game.get_valid_moves():
+                self.cache_hits += 1
+                return entry[2], entry[3]
+        return None, None
+
+    def predict_reply(self, game):
+        """
+        Guess the opponent's reply in ``game`` (opponent to move): the transposition table's best move from the
+        last search, otherwise the first move in static move order.
+
+        Returns:
+            tuple: The predicted move (row, col), or None if the opponent has no valid move.
+        """
+        valid_moves = game.get_valid_moves()
+        entry = self.tt.probe(game.hash ^ MIN_NODE_KEY)
+        if entry is not None and entry[4] in valid_moves:
+            return entry[4]
+        self.order_moves(valid_moves, None, 0)
+        return valid_moves[0] if valid_moves else None
+
+    def start_pondering(self, game, ai_agent_name=None, max_depth=60):
+        """
+        Start searching, in a background thread, the position reached if the opponent plays the predicted reply
+        in ``game``. The next ``get_best_move`` call keeps that search on a ponder hit and cancels it on a miss.
+        Pondering always searches in this process, without the worker processes.
+
+        Parameters:
+            game (OthelloGame): The position after our move, with the opponent to move. It is not modified.
+            ai_agent_name (str): The evaluation parameter set; defaults to the one of the last search.
+            max_depth (int): The maximum search depth.
+        """
+        self.stop_pondering()
+        ai_agent_name = ai_agent_name or self.last_params
+        if ai_agent_name is None:
+            return
+        move = self.predict_reply(game)
+        if move is None:
+            return
+        ponder_game = game.copy()
+        ponder_game.make_move(*move)
+        if len(ponder_game.get_valid_moves()) <= 1:
+            return
+
+        # The thread makes and unmakes moves on ``ponder_game`` while it searches, so ponder hits are tested
+        # against this record of the predicted position instead.
+        self.ponder_position = (
+            ponder_game.black_bits, ponder_game.white_bits, ponder_game.current_player, ponder_game.hash
+        )
+        self.ponder_move = move
+        self.ponder_result = None
+        self.ponder_stoppage = Stoppage()
+
+        def ponder():
+            self.ponder_result = self.search_position(
+                ponder_game, ai_agent_name, max_depth, self.ponder_stoppage, use_workers=False
+            )
+
+        self.ponder_thread = threading.Thread(target=ponder, daemon=True)
+        self.ponder_thread.start()
+
+    def stop_pondering(self):
+        """Cancel the background search started by ``start_pondering``, if any, and wait for it to end."""
+        if self.ponder_thread is None:
+            return
+        self.ponder_stoppage.stop = True
+        self.ponder_thread.join()
+        self.ponder_thread = None
+        self.ponder_position = None
+        self.ponder_move = None
 
-    def alphabeta(self, game, max_depth, stoppage, ai_agent_name ,maximizing_player=True, alpha=float("-inf"), beta=float("inf")):
+    def iterative_deepening(self, game, ai_agent_name, max_depth, stoppage, first_depth=1, use_workers=True,
+                            first_move=None):
+        """
+        Search depth ``first_depth``, ``first_depth + 1``, ... up to ``max_depth`` until ``stoppage`` stops.
+
+        Parameters:
+            game (OthelloGame): The current game state; it must have a valid move.
+            max_depth (int): The maximum search depth.
+            stoppage (Stoppage): The search's stop flag.
+            first_depth (int): The depth of the first iteration.
+            use_workers (bool): False to keep a parallel root search in this process.
+            first_move (tuple): The move to search first in the first iteration, if any.
+
+        Returns:
+            tuple: ``(score, move, depth)`` of the last completed iteration (score None and depth 0 if none
+            completed). The move comes from the interrupted iteration if it had already searched the previous
+            best move.
+        """
+        empties = game.count_stones()[2]
+        best_move = first_move or game.get_valid_moves()[0]
+        score = None
+        depth_reached = 0
+        for depth in range(first_depth, max_depth + 1):
+            if self.root_split is not None and use_workers:
+                iteration_score, move, completed = self.search_root_parallel(game, depth, stoppage, ai_agent_name, best_move)
+            elif self.algorithm == "pvs":
+                iteration_score, move, completed = self.aspiration_search(game, depth, stoppage, ai_agent_name, best_move, score)
+            else:
+                iteration_score, move, completed = self.search_root(game, depth, stoppage, ai_agent_name, best_move)
+            if move is not None:
+                best_move = move
+            if not completed:
+                break
+            score = iteration_score
+            depth_reached = depth
+            self.record_iteration(depth, score)
+            if depth >= empties:  # the whole game tree has been searched
+                break
+        return score, best_move, depth_reached
+
+    def search_root_parallel(self, game, max_depth, stoppage, ai_agent_name, first_move=None):
+        """
+        Search the root moves to ``max_depth`` across the worker processes, trying ``first_move`` first.
+
+        Returns:
+            tuple: ``(score, move, completed)`` as for ``search_root``.
+        """
+        valid_moves = game.get_valid_moves()
+        self.order_moves(valid_moves, first_move, 0)
+        if first_move in valid_moves:
+            valid_moves.remove(first_move)
+            valid_moves.insert(0, first_move)
+
+        score, move, completed, counters = self.root_split.search_root(
+            game, valid_moves, max_depth, ai_agent_name, stoppage.deadline
+        )
+        self.add_worker_counters(counters)
+        return score, move, completed
+
+    def search_move(self, game, move, max_depth, stoppage, ai_agent_name, alpha=float("-inf"), beta=float("inf")):
+        """
+        Search one root move with the configured algorithm.
+
+        Parameters:
+            game (OthelloGame): The current game state.
+            move (tuple): The root move (row, col).
+            max_depth (int): The search depth of the root.
+            stoppage (Stoppage): The search's stop flag.
+            alpha (float): The alpha value for pruning.
+            beta (float): The beta value for pruning.
+
+        Returns:
+            float: The move's score for the root player.
+        """
+        undo = game.make_move(*move)
+        if self.algorithm == "pvs":
+            score = -self.pvs(game, max_depth - 1, stoppage, ai_agent_name, -beta, -alpha, 1, -1)[0]
+        else:
+            score = self.alphabeta(game, max_depth - 1, stoppage, ai_agent_name, False, alpha, beta, 1)[0]
+        game.unmake_move(undo)
+        return score
+
+    def search_root(self, game, max_depth, stoppage, ai_agent_name, first_move=None):
+        """
+        Search the root moves to ``max_depth``, trying ``first_move`` (the previous iteration's best move) first.
+
+        Parameters:
+            game (OthelloGame): The current game state.
+            max_depth (int): The search depth of this iteration.
+            stoppage (Stoppage): The search's stop flag.
+            first_move (tuple): The move to search first, if any.
+
+        Returns:
+            tuple: ``(score, move, completed)``. Of the root moves with the best score, ``move`` is the one on the
+            lowest square, whatever the move order, so the result matches the parallel root search. If the
+            iteration was interrupted, ``move`` is the best of the root moves searched to completion, or None if not
+            even the first one finished.
+        """
+        valid_moves = game.get_valid_moves()
+        self.order_moves(valid_moves, first_move, 0)
+        if first_move in valid_moves:  # searched first even with hash-move ordering switched off
+            valid_moves.remove(first_move)
+            valid_moves.insert(0, first_move)
+
+        alpha = float("-inf")
+        best_move = None
+        for move in valid_moves:
+            # A move tying the best one is scored exactly (not cut at alpha) so that the tie can be broken.
+            eval = self.search_move(game, move, max_depth, stoppage, ai_agent_name, alpha - TIE_MARGIN)
+            if stoppage.isStop():
+                return alpha, best_move, False
+            if eval > alpha or (eval == alpha and best_move is not None and move < best_move):
+                alpha = eval
+                best_move = move
+
+        self.store(game.hash, max_depth, alpha, best_move, float("-inf"), float("inf"), stoppage)
+        return alpha, best_move, True
+
+
+    def aspiration_search(self, game, max_depth, stoppage, ai_agent_name, first_move=None, previous_score=None):
+        """
+        Run a PVS root search in a window of +/- ``aspiration_window`` around the previous iteration's score,
+        widening the failing side of the window and searching again until the score falls inside it.
+
+        Parameters:
+            game (OthelloGame): The current game state.
+            max_depth (int): The search depth of this iteration.
+            stoppage (Stoppage): The search's stop flag.
+            first_move (tuple): The move to search first, if any.
+            previous_score (float): The score of the previous iteration, or None for a full window.
+
+        Returns:
+            tuple: ``(score, move, completed)`` as for ``search_root``.
+        """
+        if previous_score is None:
+            return self.search_root_pvs(game, max_depth, stoppage, ai_agent_name, first_move)
+
+        delta = self.aspiration_window
+        alpha, beta = previous_score - delta, previous_score + delta
+        fail_high_move = None
+        while True:
+            score, move, completed = self.search_root_pvs(game, max_depth, stoppage, ai_agent_name, first_move, alpha, beta)
+            if not completed:
+                return score, move or fail_high_move, False
+            delta *= 4
+            if score <= alpha:
+                alpha = score - delta
+            elif score >= beta:
+                fail_high_move = first_move = move
+                beta = score + delta
+            else:
+                return score, move, True
+
+    def search_root_pvs(self, game, max_depth, stoppage, ai_agent_name, first_move=None, alpha=float("-inf"), beta=float("inf")):
+        """
+        Principal variation search of the root moves: the first move gets the full window, the others a zero
+        window, re-searched only when they fail high.
+
+        Parameters:
+            game (OthelloGame): The current game state.
+            max_depth (int): The search depth of this iteration.
+            stoppage (Stoppage): The search's stop flag.
+            first_move (tuple): The move to search first, if any.
+            alpha (float): Lower bound of the root window.
+            beta (float): Upper bound of the root window.
+
+        Returns:
+            tuple: ``(score, move, completed)``. Ties are broken as in ``search_root``. ``move`` is None if every
+            root move failed low, or if the iteration was interrupted before any move improved on ``alpha``.
+        """
+        valid_moves = game.get_valid_moves()
+        self.order_moves(valid_moves, first_move, 0)
+        if first_move in valid_moves:
+            valid_moves.remove(first_move)
+            valid_moves.insert(0, first_move)
+
+        alpha_orig = alpha
+        best_score = float("-inf")
+        best_move = None
+        for index, move in enumerate(valid_moves):
+            undo = game.make_move(*move)
+            if index == 0:
+                score = -self.pvs(game, max_depth - 1, stoppage, ai_agent_name, -beta, -alpha, 1, -1)[0]
+            else:
+                bound = alpha - TIE_MARGIN  # a move tying the best one gets an exact score
+                score = -self.pvs(game, max_depth - 1, stoppage, ai_agent_name, -bound - NULL_WINDOW, -bound, 1, -1)[0]
+                if bound < score < beta and not stoppage.isStop():
+                    score = -self.pvs(game, max_depth - 1, stoppage, ai_agent_name, -beta, -bound, 1, -1)[0]
+            game.unmake_move(undo)
+            if stoppage.isStop():
+                return best_score, best_move, False
+            if score > best_score:
+                best_score = score
+            if score > alpha or (score == alpha and best_move is not None and move < best_move):
+                alpha = score
+                best_move = move
+                if alpha >= beta:
+                    break
+
+        self.store(game.hash, max_depth, best_score, best_move, alpha_orig, beta, stoppage)
+        return best_score, best_move, True
+
+    def pvs(self, game, max_depth, stoppage, ai_agent_name, alpha, beta, ply, color):
+        """
+        Negamax principal variation search. Scores are from the point of view of the side to move: ``color`` is
+        1 when that is the root player and -1 otherwise, so results match ``alphabeta`` exactly.
+
+        Parameters:
+            game (OthelloGame): The current game state.
+            max_depth (int): The remaining search depth.
+            stoppage (Stoppage): The search's stop flag.
+            alpha (float): The alpha value for pruning.
+            beta (float): The beta value for pruning.
+            ply (int): Distance from the root.
+            color (int): 1 if the side to move is the root player, -1 otherwise.
+
+        Returns:
+            tuple: The score for the side to move and the corresponding best move (row, col).
+        """
+        self.nodes += 1
+        if max_depth == 0 or stoppage.isStop():
+            return color * self.leaf_value(game, ai_agent_name, color), None
+
+        key = game.hash if color == 1 else game.hash ^ MIN_NODE_KEY
+        entry = self.tt.probe(key)
+        tt_move = entry[4] if entry is not None else None
+        if entry is not None and entry[1] >= max_depth:
+            _, _, tt_score, tt_bound, tt_move, _ = entry
+            if (
+                tt_bound == EXACT
+                or (tt_bound == LOWER and tt_score >= beta)
+                or (tt_bound == UPPER and tt_score <= alpha)
+            ):
+                self.tt.cutoffs += 1
+                return tt_score, tt_move
+
+        if self.mpc_params is not None and ply > 0:
+            mpc_pairs = self.mpc_params.get(ai_agent_name, {}).get(max_depth)
+            if mpc_pairs:
+                # Negamax scores are the root player's scores times ``color``, so the fitted offset flips with it.
+                score = self.probcut(mpc_pairs, alpha, beta, color, lambda depth, low, high: self.pvs(
+                    game, depth, stoppage, ai_agent_name, low, high, ply, color)[0])
+                if score is not None:
+                    return score, tt_move
+
+        valid_moves = self.generate_moves(game)
+        if not valid_moves:
+            return color * self.leaf_value(game, ai_agent_name, color), None
+        self.order_moves(valid_moves, tt_move, ply)
+
+        alpha_orig = alpha
+        best_score = float("-inf")
+        best_move = None
+        for index, move in enumerate(valid_moves):
+            undo = game.make_move(*move)
+            if index == 0:
+                score = -self.pvs(game, max_depth - 1, stoppage, ai_agent_name, -beta, -alpha, ply + 1, -color)[0]
+            else:
+                reduction = self.reduction(index, max_depth, ply)
+                if reduction:
+                    score = -self.pvs(game, max_depth - 1 - reduction, stoppage, ai_agent_name, -alpha - NULL_WINDOW, -alpha, ply + 1, -color)[0]
+                if not reduction or self.reduction_failed(reduction, score > alpha):
+                    score = -self.pvs(game, max_depth - 1, stoppage, ai_agent_name, -alpha - NULL_WINDOW, -alpha, ply + 1, -color)[0]
+                    if alpha < score < beta:
+                        score = -self.pvs(game, max_depth - 1, stoppage, ai_agent_name, -beta, -alpha, ply + 1, -color)[0]
+            game.unmake_move(undo)
+
+            if score > best_score:
+                best_score = score
+                best_move = move
+            if score > alpha:
+                alpha = score
+                if alpha >= beta:
+                    self.record_cutoff(move, index, max_depth, ply)
+                    break
+
+        self.store(key, max_depth, best_score, best_move, alpha_orig, beta, stoppage)
+        return best_score, best_move
+
+    def alphabeta(self, game, max_depth, stoppage, ai_agent_name ,maximizing_player=True, alpha=float("-inf"), beta=float("inf"), ply=0):
         """
         Alpha-Beta Pruning algorithm for selecting the best move for the AI player.
 
@@ -62,26 +971,55 @@ class ai_agent:
             maximizing_player (bool): True if maximizing player (AI), False if minimizing player (opponent).
             alpha (float): The alpha value for pruning. Defaults to negative infinity.
             beta (float): The beta value for pruning. Defaults to positive infinity.
+            ply (int): Distance from the root, used to index the killer moves.
 
         Returns:
             tuple: A tuple containing the evaluation value of the best move and the corresponding move (row, col).
         """
-        if max_depth == 0 or game.is_game_over() or stoppage.isStop():
-                return self.evaluate_game_state(game, self.evaluation_params[ai_agent_name]), None
+        self.nodes += 1
+        if max_depth == 0 or stoppage.isStop():
+                return self.leaf_value(game, ai_agent_name, 1 if maximizing_player else -1), None
 
-        valid_moves = game.get_valid_moves()
+        key = game.hash if maximizing_player else game.hash ^ MIN_NODE_KEY
+        entry = self.tt.probe(key)
+        tt_move = entry[4] if entry is not None else None
+        if entry is not None and entry[1] >= max_depth:
+            _, _, tt_score, tt_bound, tt_move, _ = entry
+            if (
+                tt_bound == EXACT
+                or (tt_bound == LOWER and tt_score >= beta)
+                or (tt_bound == UPPER and tt_score <= alpha)
+            ):
+                self.tt.cutoffs += 1
+                return tt_score, tt_move
+
+        if self.mpc_params is not None and ply > 0:
+            mpc_pairs = self.mpc_params.get(ai_agent_name, {}).get(max_depth)
+            if mpc_pairs:
+                score = self.probcut(mpc_pairs, alpha, beta, 1, lambda depth, low, high: self.alphabeta(
+                    game, depth, stoppage, ai_agent_name, maximizing_player, low, high, ply)[0])
+                if score is not None:
+                    return score, tt_move
+
+        valid_moves = self.generate_moves(game)
+        if not valid_moves:
+                return self.leaf_value(game, ai_agent_name, 1 if maximizing_player else -1), None
+        self.order_moves(valid_moves, tt_move, ply)
+
+        alpha_orig, beta_orig = alpha, beta
 
         if maximizing_player:
             max_eval = float("-inf")
             best_move = None
 
-            for move in valid_moves:
-                new_game = OthelloGame(player_mode=game.player_mode)
-                new_game.board = [row[:] for row in game.board]
-                new_game.current_player = game.current_player
-                new_game.make_move(*move)
-
-                eval, _ = self.alphabeta(new_game, max_depth - 1, stoppage, ai_agent_name, False, alpha, beta)
+            for index, move in enumerate(valid_moves):
+                undo = game.make_move(*move)
+                reduction = self.reduction(index, max_depth, ply)
+                if reduction:
+                    eval, _ = self.alphabeta(game, max_depth - 1 - reduction, stoppage, ai_agent_name, False, alpha, alpha + NULL_WINDOW, ply + 1)
+                if not reduction or self.reduction_failed(reduction, eval > alpha):
+                    eval, _ = self.alphabeta(game, max_depth - 1, stoppage, ai_agent_name, False, alpha, beta, ply + 1)
+                game.unmake_move(undo)
 
                 if eval > max_eval:
                     max_eval = eval
@@ -89,20 +1027,23 @@ class ai_agent:
 
                 alpha = max(alpha, eval)
                 if beta <= alpha:
+                    self.record_cutoff(move, index, max_depth, ply)
                     break
 
+            self.store(key, max_depth, max_eval, best_move, alpha_orig, beta_orig, stoppage)
             return max_eval, best_move
         else:
             min_eval = float("inf")
             best_move = None
 
-            for move in valid_moves:
-                new_game = OthelloGame(player_mode=game.player_mode)
-                new_game.board = [row[:] for row in game.board]
-                new_game.current_player = game.current_player
-                new_game.make_move(*move)
-
-                eval, _ = self.alphabeta(new_game, max_depth - 1, stoppage, ai_agent_name, True, alpha, beta)
+            for index, move in enumerate(valid_moves):
+                undo = game.make_move(*move)
+                reduction = self.reduction(index, max_depth, ply)
+                if reduction:
+                    eval, _ = self.alphabeta(game, max_depth - 1 - reduction, stoppage, ai_agent_name, True, beta - NULL_WINDOW, beta, ply + 1)
+                if not reduction or self.reduction_failed(reduction, eval < beta):
+                    eval, _ = self.alphabeta(game, max_depth - 1, stoppage, ai_agent_name, True, alpha, beta, ply + 1)
+                game.unmake_move(undo)
 
                 if eval < min_eval:
                     min_eval = eval
@@ -110,20 +1051,87 @@ class ai_agent:
 
                 beta = min(beta, eval)
                 if beta <= alpha:
+                    self.record_cutoff(move, index, max_depth, ply)
                     break
 
+            self.store(key, max_depth, min_eval, best_move, alpha_orig, beta_orig, stoppage)
             return min_eval, best_move
 
+    def probcut(self, mpc_pairs, alpha, beta, sign, shallow_search):
+        """
+        Multi-ProbCut test of a node: for each ``(shallow_depth, slope, offset, sigma)`` pair, a null-window shallow
+        search checks whether the predicted deep score is at least ``mpc_threshold`` sigmas above ``beta`` or below
+        ``alpha``.
+
+        Parameters:
+            mpc_pairs (list): The fitted pairs for the node's remaining depth, cheapest first.
+            alpha (float): The node's alpha value.
+            beta (float): The node's beta value.
+            sign (int): 1 if scores are the root player's, -1 if they are negated (negamax nodes of the opponent).
+            shallow_search (callable): ``shallow_search(depth, alpha, beta)`` returns the node's score searched to
+                ``depth`` with that window.
+
+        Returns:
+            float: ``beta`` or ``alpha`` if the node can be cut, otherwise None.
+        """
+        margin = self.mpc_threshold
+        for shallow_depth, slope, offset, sigma in mpc_pairs:
+            offset *= sign
+            if beta != float("inf"):
+                bound = (beta + margin * sigma - offset) / slope
+                if shallow_search(shallow_depth, bound - NULL_WINDOW, bound) >= bound:
+                    self.probcut_cuts += 1
+                    return beta
+            if alpha != float("-inf"):
+                bound = (alpha - margin * sigma - offset) / slope
+                if shallow_search(shallow_depth, bound, bound + NULL_WINDOW) <= bound:
+                    self.probcut_cuts += 1
+                    return alpha
+        return None
+
+    def store(self, key, depth, score, move, alpha, beta, stoppage):
+        """
+        Save a finished node in the transposition table with the bound implied by the
+        window it was searched with. Results of interrupted searches are not stored.
+
+        Parameters:
+            key (int): The node's table key.
+            depth (int): The remaining depth searched.
+            score (float): The node's score.
+            move (tuple): The best move found.
+            alpha (float): The alpha value the node was entered with.
+            beta (float): The beta value the node was entered with.
+            stoppage (Stoppage): The search's stop flag.
+        """
+        if stoppage.isStop():
+            return
+        if score <= alpha:
+            bound = UPPER
+        elif score >= beta:
+            bound = LOWER
+        else:
+            bound = EXACT
+        self.tt.store(key, depth, score, bound, move)
+
     def evaluate_game_state(self, game, evaluation_params):
         """
-        Evaluates the current game state for the AI player.
+        Evaluates the current game state for the player to move.
 
         Parameters:
             game (OthelloGame): The current game state.
+            evaluation_params (dict): Feature weights, per-phase feature weights under "phase_weights" (see
+                training.py), or a "pattern_weights" file for the pattern evaluator.
 
         Returns:
-            float: The evaluation value representing the desirability of the game state for the AI player.
+            float: The evaluation value representing the desirability of the game state for the player to move.
         """
+        pattern_weights = evaluation_params.get("pattern_weights")
+        if pattern_weights is not None:
+            return self.pattern_evaluator(pattern_weights).evaluate(game)
+        phase_weights = evaluation_params.get("phase_weights")
+        if phase_weights is not None:
+            evaluation_params = phase_weights[phase_of(game.empty_count, len(phase_weights))]
+
         # Evaluation weights for different factors
         
         coin_parity_weight = evaluation_params["coin_parity_weight"]
@@ -132,31 +1140,7 @@ class ai_agent:
         stability_weight = evaluation_params["stability_weight"]
         edge_occupancy_weight = evaluation_params["edge_occupancy_weight"]
         
-
-        # Coin parity (difference in disk count)
-        player_disk_count = sum(row.count(game.current_player) for row in game.board)
-        opponent_disk_count = sum(row.count(-game.current_player) for row in game.board)
-        coin_parity = player_disk_count - opponent_disk_count
-
-        # Mobility (number of valid moves for the current player)
-        player_valid_moves = len(game.get_valid_moves())
-        opponent_valid_moves = len(
-            OthelloGame(player_mode=-game.current_player).get_valid_moves()
-        )
-        mobility = player_valid_moves - opponent_valid_moves
-
-        # Corner occupancy (number of player disks in the corners)
-        corner_occupancy = sum(
-            game.board[i][j] for i, j in [(0, 0), (0, 7), (7, 0), (7, 7)]
-        )
-
-        # Stability (number of stable disks)
-        stability = self.calculate_stability(game)
-
-        # Edge occupancy (number of player disks on the edges)
-        edge_occupancy = sum(game.board[i][j] for i in [0, 7] for j in range(1, 7)) + sum(
-            game.board[i][j] for i in range(1, 7) for j in [0, 7]
-        )
+        coin_parity, mobility, corner_occupancy, stability, edge_occupancy = self.evaluation_features(game)
 
         # Combine the factors with the corresponding weights to get the final evaluation value
         evaluation = (
@@ -169,44 +1153,58 @@ class ai_agent:
 
         return evaluation
 
-
-    def calculate_stability(self, game):
+    def evaluation_features(self, game):
         """
-        Calculates the stability of the AI player's disks on the board.
+        Computes the features weighted by ``evaluate_game_state``.
 
         Parameters:
             game (OthelloGame): The current game state.
 
         Returns:
-            int: The number of stable disks for the AI player.
+            tuple: The values of the features named by ``EVALUATION_FEATURES``, in that order.
         """
+        # Every feature is the side to move's count minus the opponent's, so that the evaluation of one side is
+        # the negated evaluation of the other.
+        player = game.current_player
 
-        def neighbors(row, col):
-            return [
-                (row + dr, col + dc)
-                for dr in [-1, 0, 1]
-                for dc in [-1, 0, 1]
-                if (dr, dc) != (0, 0) and 0 <= row + dr < 8 and 0 <= col + dc < 8
-            ]
+        # Coin parity (difference in disk count), maintained incrementally by OthelloGame
+        coin_parity = player * game.disc_diff
 
-        corners = [(0, 0), (0, 7), (7, 0), (7, 7)]
-        edges = [(i, j) for i in [0, 7] for j in range(1, 7)] + [
-            (i, j) for i in range(1, 7) for j in [0, 7]
-        ]
-        inner_region = [(i, j) for i in range(2, 6) for j in range(2, 6)]
-        regions = [corners, edges, inner_region]
+        # Mobility (number of valid moves for the current player minus the opponent's), the only feature
+        # recomputed from scratch
+        own, opp = game.own_and_opponent_bits()
+        mobility = popcount(legal_moves(own, opp)) - popcount(legal_moves(opp, own))
 
-        stable_count = 0
+        # Corner occupancy (disks in the corners; OthelloGame keeps Black minus White)
+        corner_occupancy = player * game.corner_sum
 
-        def is_stable_disk(row, col):
-            return (
-                all(game.board[r][c] == game.current_player for r, c in neighbors(row, col))
-                or (row, col) in edges + corners
-            )
+        # Stability (number of stable disks)
+        stability = self.calculate_stability(game)
+
+        # Edge occupancy (disks on the non-corner edge squares; OthelloGame keeps Black minus White)
+        edge_occupancy = player * game.edge_sum
 
-        for region in regions:
-            for row, col in region:
-                if game.board[row][col] == game.current_player and is_stable_disk(row, col):
-                    stable_count += 1
+        return coin_parity, mobility, corner_occupancy, stability, edge_occupancy
 
-        return stable_count
\ No newline at end of file
+
+    def pattern_evaluator(self, path):
+        """Return the PatternEvaluator of a weight file, loading it on first use."""
+        evaluator = self.pattern_evaluators.get(path)
+        if evaluator is None:
+            evaluator = self.pattern_evaluators[path] = PatternEvaluator(path)
+        return evaluator
+
+    def calculate_stability(self, game):
+        """
+        Calculates the stability of the player to move's disks on the board relative to the opponent's.
+
+        Only disks that can never be flipped again are counted (see stability.py).
+
+        Parameters:
+            game (OthelloGame): The current game state.
+
+        Returns:
+            int: The number of stable disks of the player to move minus the opponent's.
+        """
+        own, opp = game.own_and_opponent_bits()
+        return stable_disc_difference(own, opp)
\ No newline at end of file
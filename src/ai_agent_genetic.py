@@ -1,23 +1,129 @@
 from othello_game import OthelloGame
+from bitboard import CORNERS, EDGES, legal_moves, popcount
 from evaluator import Evaluator
+from stability import stable_disc_difference
+from search_stats import SearchStats, make_sink
+from concurrent.futures import ProcessPoolExecutor
 import random
+import time
+
+GA_MODES = ("move", "plan")
+# Added to the final disc difference of a finished game, so any win outranks any evaluation.
+GAME_OVER_SCORE = 1000
+
+_worker_agent = None
+
+
+def _score_plans(position, plans):
+    """Score plans in a worker process (see ``ai_agent_genetic.score_plans``)."""
+    global _worker_agent
+    if _worker_agent is None:
+        _worker_agent = ai_agent_genetic()
+    return _worker_agent.score_plans(position, plans)
+
 
 class ai_agent_genetic:
 
-    def __init__(self) -> None:
-            pass
+    def __init__(self, stats_sink=None, mode="move", plan_plies=4, workers=1, elite=2, mutation_rate=0.3) -> None:
+            """
+            Parameters:
+                stats_sink (str or file): JSON-lines file (a path or an open text file) that receives the SearchStats
+                    of every ``get_best_move`` call.
+                mode (str): "move" to evolve single moves, or "plan" to evolve move sequences of ``plan_plies``
+                    plies (own moves and opponent replies), scored by minimax over every plan evaluated so far.
+                plan_plies (int): Length of the plans in "plan" mode.
+                workers (int): Number of processes scoring the plans of a generation in parallel. With more than
+                    one, ``close()`` should be called when done.
+                elite (int): Best plans copied unchanged into the next generation.
+                mutation_rate (float): Probability that a new plan has one of its moves replaced.
+            """
+            if mode not in GA_MODES:
+                raise ValueError(f"mode must be one of {GA_MODES}, got {mode!r}")
+            self.stats_sink = make_sink(stats_sink)
+            self.evaluator = Evaluator()
+            self.mode = mode
+            self.plan_plies = plan_plies
+            self.workers = workers
+            self.elite = elite
+            self.mutation_rate = mutation_rate
+            self.executor = None
+            self.last_stats = None
+            self.reset_counters()
 
-    def get_best_move(self, game, ai_agent_name, max_generations=50, population_size=20):
+    def close(self):
+        """Shut down the worker processes, if any, and close the statistics sink."""
+        if self.executor is not None:
+            self.executor.shutdown(cancel_futures=True)
+            self.executor = None
+        if self.stats_sink is not None:
+            self.stats_sink.close()
 
-        _, best_move = self.genetic_algorithm(game, max_generations, population_size)
-        return best_move
+    def reset_counters(self):
+        self.nodes = 0
+        self.saved_evaluations = 0
+        self.movegen_seconds = 0.0
+        self.eval_seconds = 0.0
+        self.iterations = []
+        self.search_start = time.perf_counter()
+
+    def get_best_move(self, game, ai_agent_name, max_generations=50, population_size=20, return_stats=False,
+                      time_budget=None):
+        """
+        Parameters:
+            game (OthelloGame): The current game state.
+            ai_agent_name (str): Name reported in the statistics.
+            max_generations (int): Generations to evolve at most.
+            population_size (int): Individuals per generation.
+            return_stats (bool): True to return ``(move, SearchStats)`` instead of the move alone.
+            time_budget (float): In "plan" mode, seconds after which the best move found so far is returned.
+
+        Returns:
+            tuple: The best move (row, col), or None in "plan" mode if there is no valid move.
+        """
+        self.reset_counters()
+        if self.mode == "plan":
+            _, best_move = self.plan_algorithm(game, max_generations, population_size, time_budget)
+        else:
+            _, best_move = self.genetic_algorithm(game, max_generations, population_size)
+
+        # Every fitness evaluation scores the end of one line: nodes and leaf evaluations are the same count.
+        stats = SearchStats(
+            "ai_agent_genetic",
+            ai_agent_name,
+            best_move,
+            self.plan_plies if self.mode == "plan" else 1,
+            time.perf_counter() - self.search_start,
+            self.iterations,
+            nodes=self.nodes,
+            leaf_evals=self.nodes,
+            movegen_seconds=self.movegen_seconds,
+            eval_seconds=self.eval_seconds,
+            saved_evaluations=self.saved_evaluations,
+        )
+        self.last_stats = stats
+        if self.stats_sink is not None:
+            self.stats_sink.write(stats)
+        return (best_move, stats) if return_stats else best_move
+
+    def generate_moves(self, game):
+        start = time.perf_counter()
+        valid_moves = game.get_valid_moves()
+        self.movegen_seconds += time.perf_counter() - start
+        return valid_moves
 
     def genetic_algorithm(self, game, max_generations, population_size):
 
-            population = [random.choice(game.get_valid_moves()) for _ in range(population_size)]
+            # A move's fitness never changes during a call, so each distinct move is evaluated once.
+            self.fitness_cache = {}
+            self.valid_moves = valid_moves = self.generate_moves(game)
+            population = [random.choice(valid_moves) for _ in range(population_size)]
 
             for generation in range(max_generations):
-                fitness_scores = [(move, self.evaluate_move(game, move)) for move in population]
+                fitness_scores = [(move, self.fitness(game, move)) for move in population]
+                if len(set(population)) == 1 or all(move in self.fitness_cache for move in valid_moves):
+                    # Converged, or every legal move has been scored: later generations cannot find anything new.
+                    self.record_generation(fitness_scores)
+                    break
                 parents = self.selection(fitness_scores)
 
                 next_generation = []
@@ -29,25 +135,44 @@ class ai_agent_genetic:
                     next_generation.append(self.mutate(offspring2, game))
 
                 population = next_generation
+                self.record_generation(fitness_scores)
 
-            best_move = max(population, key=lambda move: self.evaluate_move(game, move))
-            best_eval = self.evaluate_move(game, best_move)
-            return best_eval, best_move
+            # Crossover can produce illegal squares; only legal moves that were scored are candidates.
+            best_move = max((move for move in valid_moves if move in self.fitness_cache), key=self.fitness_cache.get)
+            return self.fitness_cache[best_move], best_move
 
-    def evaluate_move(self, game, move):
-        new_game = OthelloGame(player_mode=game.player_mode)
-        new_game.board = [row[:] for row in game.board]
-        new_game.current_player = game.current_player
-        new_game.make_move(*move) 
+    def record_generation(self, fitness_scores):
+        self.iterations.append({
+            "depth": self.plan_plies if self.mode == "plan" else 1,
+            "seconds": time.perf_counter() - self.search_start,
+            "nodes": self.nodes,
+            "score": max(score for _, score in fitness_scores),
+        })
 
-        evaluator = Evaluator()
+    def fitness(self, game, move):
+        """Return the score of ``move``, evaluating it only the first time it is seen in this call."""
+        score = self.fitness_cache.get(move)
+        if score is None:
+            score = self.fitness_cache[move] = self.evaluate_move(game, move)
+        else:
+            self.saved_evaluations += 1
+        return score
+
+    def evaluate_move(self, game, move):
+        undo = game.make_move(*move)
 
-        start_board = new_game.board 
+        start_board = game.board
 
-        player = new_game.current_player
+        player = game.current_player
         opponent = -player
 
-        return evaluator.score(start_board, new_game, currentDepth=0, player=player, opponent=opponent)
+        start = time.perf_counter()
+        score = self.evaluator.score(start_board, game, currentDepth=0, player=player, opponent=opponent)
+        self.eval_seconds += time.perf_counter() - start
+        self.nodes += 1
+        if undo is not None:  # crossover can produce illegal squares
+            game.unmake_move(undo)
+        return score
 
     def selection(self, fitness_scores):
         fitness_scores.sort(key=lambda x: x[1], reverse=True)
@@ -61,28 +186,29 @@ class ai_agent_genetic:
         return offspring1, offspring2
 
     def mutate(self, move, game):
-        valid_moves = game.get_valid_moves()
         if random.random() < 0.1:
-            return random.choice(valid_moves)
+            return random.choice(self.valid_moves)
         return move
 
-    def evaluate_game_state(self, game):
-        weights = self.dynamic_weights(len(game.get_valid_moves()))
+    def evaluate_game_state(self, game, player=None):
+        """
+        Evaluate a position for ``player`` (the side to move by default). Every feature is that player's count
+        minus the opponent's, so the score does not depend on whose turn it is.
+        """
+        weights = self.dynamic_weights(game.empty_count)
 
-        player_disk_count = sum(row.count(game.current_player) for row in game.board)
-        opponent_disk_count = sum(row.count(-game.current_player) for row in game.board)
-        coin_parity = player_disk_count - opponent_disk_count
+        own, opp = game.own_and_opponent_bits()
+        if player is not None and player != game.current_player:
+            own, opp = opp, own
+        coin_parity = popcount(own) - popcount(opp)
 
-        player_valid_moves = len(game.get_valid_moves())
-        opponent_valid_moves = len(OthelloGame(player_mode=-game.current_player).get_valid_moves())
-        mobility = player_valid_moves - opponent_valid_moves
+        mobility = popcount(legal_moves(own, opp)) - popcount(legal_moves(opp, own))
 
-        corner_occupancy = sum(game.board[i][j] == game.current_player for i, j in [(0, 0), (0, 7), (7, 0), (7, 7)])
+        corner_occupancy = popcount(own & CORNERS) - popcount(opp & CORNERS)
 
-        stability = self.calculate_stability(game)
+        stability = stable_disc_difference(own, opp)
 
-        edge_occupancy = sum(game.board[i][j] == game.current_player for i in [0, 7] for j in range(1, 7)) + \
-                        sum(game.board[i][j] == game.current_player for i in range(1, 7) for j in [0, 7])
+        edge_occupancy = popcount(own & EDGES) - popcount(opp & EDGES)
 
         evaluation = (
             coin_parity * weights["coin_parity"] +
@@ -94,23 +220,155 @@ class ai_agent_genetic:
 
         return evaluation
 
-    def calculate_stability(self, game):
-        def neighbors(row, col):
-            return [
-                (row + dr, col + dc)
-                for dr in [-1, 0, 1]
-                for dc in [-1, 0, 1]
-                if (dr, dc) != (0, 0) and 0 <= row + dr < 8 and 0 <= col + dc < 8
-            ]
-
-        stable_count = 0
-        for i in range(8):
-            for j in range(8):
-                if game.board[i][j] == game.current_player and all(
-                    game.board[r][c] == game.current_player for r, c in neighbors(i, j)
-                ):
-                    stable_count += 1
-        return stable_count
+    def plan_algorithm(self, game, max_generations, population_size, time_budget=None):
+        """
+        Evolve plans: sequences of up to ``plan_plies`` legal moves from ``game``, alternating sides.
+
+        Every plan is scored once, by evaluating the position it ends in. The plans evaluated so far form a sampled
+        game tree, and a plan's fitness is the minimax value of its first move in that tree, so the GA keeps
+        looking for the opponent replies that refute the most promising moves. The best ``elite`` plans survive
+        unchanged; the search stops after ``max_generations`` or ``time_budget`` seconds, whichever comes first.
+
+        Returns:
+            tuple: ``(score, move)`` of the best first move, or ``(None, None)`` without a valid move.
+        """
+        deadline = self.search_start + time_budget if time_budget is not None else None
+        self.valid_moves = self.generate_moves(game)
+        if not self.valid_moves:
+            return None, None
+        position = (game.black_bits, game.white_bits, game.current_player)
+        self.plan_scores = {}
+        population = [self.repair_plan(game, ()) for _ in range(population_size)]
+
+        for generation in range(max_generations):
+            self.score_population(position, population)
+            values = self.plan_values()
+            fitness_scores = [(plan, values[plan[:1]]) for plan in population]
+            self.record_generation(fitness_scores)
+            if deadline is not None and time.perf_counter() >= deadline:
+                break
+
+            ranked = list(dict.fromkeys(population))
+            random.shuffle(ranked)  # ties between plans of one first move are broken at random
+            ranked.sort(key=lambda plan: values[plan[:1]], reverse=True)
+            parents = ranked[:max(2, len(ranked) // 2)]
+            next_generation = ranked[:self.elite]
+            while len(next_generation) < population_size:
+                parent1, parent2 = random.sample(parents, 2) if len(parents) > 1 else (parents[0], parents[0])
+                offspring = self.crossover_plans(game, parent1, parent2)
+                if random.random() < self.mutation_rate:
+                    offspring = self.mutate_plan(game, offspring)
+                next_generation.append(offspring)
+            population = next_generation
+
+        values = self.plan_values()
+        best_move = max(self.valid_moves, key=lambda move: values.get((move,), float("-inf")))
+        return values[(best_move,)], best_move
+
+    def repair_plan(self, game, plan):
+        """
+        Make a plan legal: play its moves in turn, replacing any that is illegal in the position reached (or
+        missing) by a random legal one, and stop where the game ends.
+
+        Returns:
+            tuple: A plan of ``plan_plies`` moves, shorter only if the game ends first.
+        """
+        moves = []
+        undos = []
+        for ply in range(self.plan_plies):
+            valid_moves = self.generate_moves(game)
+            if not valid_moves:
+                break
+            move = plan[ply] if ply < len(plan) else None
+            if move not in valid_moves:
+                move = random.choice(valid_moves)
+            undos.append(game.make_move(*move))
+            moves.append(move)
+        for undo in reversed(undos):
+            game.unmake_move(undo)
+        return tuple(moves)
+
+    def crossover_plans(self, game, parent1, parent2):
+        """One-point crossover: the start of ``parent1`` followed by the rest of ``parent2``, repaired."""
+        cut = random.randint(1, max(1, min(len(parent1), len(parent2))))
+        return self.repair_plan(game, parent1[:cut] + parent2[cut:])
+
+    def mutate_plan(self, game, plan):
+        """Replace one move of ``plan`` by a random legal move, keeping the later moves where they stay legal."""
+        ply = random.randrange(len(plan))
+        return self.repair_plan(game, plan[:ply] + (None,) + plan[ply + 1:])
+
+    def score_population(self, position, population):
+        """Score the plans of ``population`` not scored yet, in the worker processes if there are several."""
+        new_plans = [plan for plan in dict.fromkeys(population) if plan not in self.plan_scores]
+        self.saved_evaluations += len(population) - len(new_plans)
+        if not new_plans:
+            return
+        start = time.perf_counter()
+        if self.workers > 1 and len(new_plans) > 1:
+            if self.executor is None:
+                self.executor = ProcessPoolExecutor(max_workers=self.workers)
+            size = -(-len(new_plans) // self.workers)
+            batches = [new_plans[i:i + size] for i in range(0, len(new_plans), size)]
+            scores = [score for batch in self.executor.map(_score_plans, [position] * len(batches), batches)
+                      for score in batch]
+        else:
+            scores = self.score_plans(position, new_plans)
+        self.eval_seconds += time.perf_counter() - start
+        self.nodes += len(new_plans)
+        self.plan_scores.update(zip(new_plans, scores))
+
+    def score_plans(self, position, plans):
+        """
+        Parameters:
+            position (tuple): ``(black_bits, white_bits, player)`` of the root.
+            plans (list): Plans legal from the root.
+
+        Returns:
+            list: The score of the position each plan ends in, for the root player.
+        """
+        black_bits, white_bits, player = position
+        game = OthelloGame.from_bits(black_bits, white_bits, player)
+        scores = []
+        for plan in plans:
+            undos = [game.make_move(*move) for move in plan]
+            own, opp = game.own_and_opponent_bits()
+            if not legal_moves(own, opp):  # the game is over
+                disc_diff = player * game.disc_diff
+                score = disc_diff + (GAME_OVER_SCORE if disc_diff > 0 else -GAME_OVER_SCORE if disc_diff < 0 else 0)
+            else:
+                score = self.evaluate_game_state(game, player)
+            scores.append(score)
+            for undo in reversed(undos):
+                game.unmake_move(undo)
+        return scores
+
+    def plan_values(self):
+        """
+        Back the plan scores up the tree of plan prefixes: the root player maximises, the opponent minimises.
+
+        Returns:
+            dict: Minimax value of every prefix of a scored plan.
+        """
+        children = {}
+        for plan in self.plan_scores:
+            for length in range(1, len(plan)):
+                children.setdefault(plan[:length], set()).add(plan[:length + 1])
+        values = {}
+
+        def value(prefix):
+            if prefix not in values:
+                if prefix in children:
+                    child_values = [value(child) for child in children[prefix]]
+                    # After an even number of plies the root player is to move.
+                    values[prefix] = max(child_values) if len(prefix) % 2 == 0 else min(child_values)
+                else:
+                    values[prefix] = self.plan_scores[prefix]
+            return values[prefix]
+
+        for plan in self.plan_scores:
+            value(plan[:1])
+        return values
 
     def dynamic_weights(self, num_moves_left):
         if num_moves_left > 40:
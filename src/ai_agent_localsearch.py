@@ -2,37 +2,39 @@ import time
 import random
 import math
 from othello_game import OthelloGame
+from stability import stable_disc_difference
+from search_stats import SearchStats, make_sink
 
 class ai_agent_localsearch:
-    def __init__(self) -> None:
-        pass
+    def __init__(self, stats_sink=None) -> None:
+        self.stats_sink = make_sink(stats_sink)
+        self.last_stats = None
+        self.nodes = 0
+        self.movegen_seconds = 0.0
+        self.eval_seconds = 0.0
 
     def scheduling_function(self, end_time, max_time):
         return (end_time - time.time())
 
-    def get_best_move(self, game, ai_agent_name, max_time=4, move_probability=0.5):
+    def get_best_move(self, game, ai_agent_name, max_time=4, move_probability=0.5, return_stats=False):
         start_time = time.time()
         end_time = start_time + max_time
         selected_move = []
+        self.nodes = 0
+        self.movegen_seconds = 0.0
+        self.eval_seconds = 0.0
+        search_start = time.perf_counter()
 
-        current_move = random.choice(game.get_valid_moves())
-        first_game_eval = OthelloGame(player_mode=game.player_mode)
-        first_game_eval.board = [row[:] for row in game.board]
-        first_game_eval.current_player = game.current_player
-        first_game_eval.make_move(*current_move)
-        current_state_value = self.evaluate_game_state(first_game_eval)
+        current_move = random.choice(self.generate_moves(game))
+        current_state_value = self.evaluate_move(game, current_move)
 
         T = 4.0 
         while T > 0:
             T = self.scheduling_function(end_time = end_time, max_time = max_time) 
             if(T<=0):
                 break
-            new_move = random.choice(game.get_valid_moves())
-            new_game = OthelloGame(player_mode=game.player_mode)
-            new_game.board = [row[:] for row in game.board]
-            new_game.current_player = game.current_player
-            new_game.make_move(*new_move)
-            new_state_value = self.evaluate_game_state(new_game)
+            new_move = random.choice(self.generate_moves(game))
+            new_state_value = self.evaluate_move(game, new_move)
 
             if (new_move not in selected_move):
                 if (new_state_value > current_state_value):
@@ -46,8 +48,38 @@ class ai_agent_localsearch:
                         current_state_value = new_state_value
                 selected_move.append(new_move)
 
-
-        return current_move
+        seconds = time.perf_counter() - search_start
+        stats = SearchStats(
+            "ai_agent_localsearch",
+            ai_agent_name,
+            current_move,
+            1,
+            seconds,
+            [{"depth": 1, "seconds": seconds, "nodes": self.nodes, "score": current_state_value}],
+            nodes=self.nodes,
+            leaf_evals=self.nodes,
+            movegen_seconds=self.movegen_seconds,
+            eval_seconds=self.eval_seconds,
+        )
+        self.last_stats = stats
+        if self.stats_sink is not None:
+            self.stats_sink.write(stats)
+        return (current_move, stats) if return_stats else current_move
+
+    def generate_moves(self, game):
+        start = time.perf_counter()
+        valid_moves = game.get_valid_moves()
+        self.movegen_seconds += time.perf_counter() - start
+        return valid_moves
+
+    def evaluate_move(self, game, move):
+        undo = game.make_move(*move)
+        start = time.perf_counter()
+        value = self.evaluate_game_state(game)
+        self.eval_seconds += time.perf_counter() - start
+        self.nodes += 1
+        game.unmake_move(undo)
+        return value
 
 
     def evaluate_game_state(self, game):
@@ -95,33 +127,6 @@ class ai_agent_localsearch:
         return evaluation
 
     def calculate_stability(self, game):
-
-        def neighbors(row, col):
-            return [
-                (row + dr, col + dc)
-                for dr in [-1, 0, 1]
-                for dc in [-1, 0, 1]
-                if (dr, dc) != (0, 0) and 0 <= row + dr < 8 and 0 <= col + dc < 8
-            ]
-
-        corners = [(0, 0), (0, 7), (7, 0), (7, 7)]
-        edges = [(i, j) for i in [0, 7] for j in range(1, 7)] + [
-            (i, j) for i in range(1, 7) for j in [0, 7]
-        ]
-        inner_region = [(i, j) for i in range(2, 6) for j in range(2, 6)]
-        regions = [corners, edges, inner_region]
-
-        stable_count = 0
-
-        def is_stable_disk(row, col):
-            return (
-                all(game.board[r][c] == game.current_player for r, c in neighbors(row, col))
-                or (row, col) in edges + corners
-            )
-
-        for region in regions:
-            for row, col in region:
-                if game.board[row][col] == game.current_player and is_stable_disk(row, col):
-                    stable_count += 1
-
-        return stable_count
+        """Return the current player's stable disks minus the opponent's (see stability.py)."""
+        own, opp = game.own_and_opponent_bits()
+        return stable_disc_difference(own, opp)
@@ -0,0 +1,235 @@
+"""
+Bitboard helpers used by OthelloGame.
+
+A side's discs are stored in a single 64-bit integer where bit ``row * 8 + col``
+is set when that side has a disc on square (row, col). Legal moves and flips are
+computed with shift-and-mask operations over whole boards instead of walking the
+eight directions square by square.
+"""
+
+FULL_MASK = 0xFFFFFFFFFFFFFFFF
+# Every column except the A and H files, used to stop horizontal/diagonal wrap-around.
+INNER_COLUMNS = 0x7E7E7E7E7E7E7E7E
+
+# (shift, mask) per direction. A positive shift moves towards higher square indices.
+DIRECTIONS = (
+    (1, INNER_COLUMNS),   # east
+    (-1, INNER_COLUMNS),  # west
+    (8, FULL_MASK),       # south
+    (-8, FULL_MASK),      # north
+    (9, INNER_COLUMNS),   # south-east
+    (-9, INNER_COLUMNS),  # north-west
+    (7, INNER_COLUMNS),   # south-west
+    (-7, INNER_COLUMNS),  # north-east
+)
+
+CORNERS = 0x8100000000000081
+# Edge squares other than the corners.
+EDGES = 0x7E8181818181817E
+
+
+def square_index(row, col):
+    """Return the bit index of square (row, col)."""
+    return row * 8 + col
+
+
+def square_bit(row, col):
+    """Return a bitboard with only square (row, col) set."""
+    return 1 << (row * 8 + col)
+
+
+def popcount(bits):
+    """Return the number of set bits."""
+    return bits.bit_count()
+
+
+def iter_squares(bits):
+    """
+    Yield the indices of the set bits, lowest first (row-major board order).
+
+    Args:
+        bits (int): The bitboard to iterate.
+    """
+    while bits:
+        low = bits & -bits
+        yield low.bit_length() - 1
+        bits ^= low
+
+
+def legal_moves(own, opp):
+    """
+    Compute every legal move for the side owning ``own``.
+
+    Args:
+        own (int): Bitboard of the side to move.
+        opp (int): Bitboard of the opponent.
+
+    Returns:
+        int: A bitboard with one bit set per legal move.
+    """
+    empty = ~(own | opp) & FULL_MASK
+    moves = 0
+    for amount, mask in DIRECTIONS:
+        o = opp & mask
+        if amount > 0:
+            t = (own << amount) & o
+            t |= (t << amount) & o
+            t |= (t << amount) & o
+            t |= (t << amount) & o
+            t |= (t << amount) & o
+            t |= (t << amount) & o
+            moves |= (t << amount) & empty
+        else:
+            amount = -amount
+            t = (own >> amount) & o
+            t |= (t >> amount) & o
+            t |= (t >> amount) & o
+            t |= (t >> amount) & o
+            t |= (t >> amount) & o
+            t |= (t >> amount) & o
+            moves |= (t >> amount) & empty
+    return moves
+
+
+def flips(own, opp, square):
+    """
+    Compute the discs flipped by the side owning ``own`` playing on ``square``.
+
+    Args:
+        own (int): Bitboard of the side to move.
+        opp (int): Bitboard of the opponent.
+        square (int): Bit index of the move.
+
+    Returns:
+        int: A bitboard of the opponent discs that would be flipped (0 if none).
+    """
+    bit = 1 << square
+    flipped = 0
+    for amount, mask in DIRECTIONS:
+        o = opp & mask
+        run = 0
+        if amount > 0:
+            x = (bit << amount) & FULL_MASK
+            while x & o:
+                run |= x
+                x = (x << amount) & FULL_MASK
+        else:
+            amount = -amount
+            x = bit >> amount
+            while x & o:
+                run |= x
+                x >>= amount
+        if x & own:
+            flipped |= run
+    return flipped
+
+
+def flip_vertical(bits):
+    """Mirror a bitboard top to bottom (row r becomes row 7 - r)."""
+    return int.from_bytes(bits.to_bytes(8, "little"), "big")
+
+
+# REVERSED_BYTES[b] is byte b with its bit order reversed.
+REVERSED_BYTES = bytes(int(f"{b:08b}"[::-1], 2) for b in range(256))
+
+
+def mirror_horizontal(bits):
+    """Mirror a bitboard left to right (column c becomes column 7 - c)."""
+    return int.from_bytes(bits.to_bytes(8, "little").translate(REVERSED_BYTES), "little")
+
+
+def flip_diagonal(bits):
+    """Transpose a bitboard: square (row, col) goes to (col, row)."""
+    t = 0x0F0F0F0F00000000 & (bits ^ (bits << 28))
+    bits ^= t ^ (t >> 28)
+    t = 0x3333000033330000 & (bits ^ (bits << 14))
+    bits ^= t ^ (t >> 14)
+    t = 0x5500550055005500 & (bits ^ (bits << 7))
+    bits ^= t ^ (t >> 7)
+    return bits & FULL_MASK
+
+
+def transform(bits, symmetry):
+    """
+    Apply one of the 8 board symmetries to a bitboard.
+
+    Args:
+        bits (int): The bitboard.
+        symmetry (int): 0-7; bit 0 mirrors left to right, bit 1 top to bottom and bit 2
+            transposes, in that order.
+    """
+    if symmetry & 1:
+        bits = mirror_horizontal(bits)
+    if symmetry & 2:
+        bits = flip_vertical(bits)
+    if symmetry & 4:
+        bits = flip_diagonal(bits)
+    return bits
+
+
+# SYMMETRY_SQUARES[symmetry][square] is where ``transform`` sends ``square``, and
+# INVERSE_SYMMETRY_SQUARES maps it back.
+SYMMETRY_SQUARES = [
+    [transform(1 << square, symmetry).bit_length() - 1 for square in range(64)] for symmetry in range(8)
+]
+INVERSE_SYMMETRY_SQUARES = [
+    [squares.index(square) for square in range(64)] for squares in SYMMETRY_SQUARES
+]
+
+
+def canonical(own, opp):
+    """
+    Find the canonical orientation of a position: the smallest ``(own, opp)`` pair over the 8 symmetries.
+
+    Args:
+        own (int): Bitboard of the side to move.
+        opp (int): Bitboard of the opponent.
+
+    Returns:
+        tuple: ``(own, opp, symmetry)`` of the canonical orientation.
+    """
+    best = (own, opp, 0)
+    for symmetry in range(1, 8):
+        candidate = (transform(own, symmetry), transform(opp, symmetry), symmetry)
+        if candidate < best:
+            best = candidate
+    return best
+
+
+def to_rows(black, white):
+    """
+    Expand two bitboards into the 8x8 list-of-lists layout (1 black, -1 white, 0 empty).
+
+    Args:
+        black (int): Bitboard of the black discs.
+        white (int): Bitboard of the white discs.
+
+    Returns:
+        list: An 8x8 list of lists.
+    """
+    rows = []
+    for row in range(8):
+        b = (black >> (row * 8)) & 0xFF
+        w = (white >> (row * 8)) & 0xFF
+        rows.append([1 if b >> col & 1 else (-1 if w >> col & 1 else 0) for col in range(8)])
+    return rows
+
+
+def from_rows(board):
+    """
+    Pack an 8x8 list-of-lists board (1 black, -1 white, 0 empty) into two bitboards.
+
+    Args:
+        board (list): An 8x8 list of lists.
+
+    Returns:
+        tuple: The (black, white) bitboards.
+    """
+    black = white = 0
+    for row in range(8):
+        for col in range(8):
+            if board[row][col] == 1:
+                black |= 1 << (row * 8 + col)
+            elif board[row][col] == -1:
+                white |= 1 << (row * 8 + col)
+    return black, white
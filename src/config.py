@@ -7,3 +7,5 @@ MIN = 1
 DEFAULT_LEVEL = 0
 HUMAN = "computer"
 COMPUTER = "randomPlayer"
+DEBUG_HASH = False  # recompute OthelloGame.hash from scratch after every move
+DEBUG_FEATURES = False  # recompute OthelloGame's evaluation features from scratch after every move
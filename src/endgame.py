@@ -0,0 +1,175 @@
+"""
+Exact endgame solver working directly on bitboards.
+
+The solver follows the rules of OthelloGame: when the side to move has no valid move the game is
+over, and the result is the disc difference from the point of view of the side to move.
+"""
+from bitboard import FULL_MASK, flips, iter_squares, legal_moves, popcount
+
+# Quadrant masks used for parity ordering.
+QUADRANTS = (
+    0x000000000F0F0F0F,
+    0x00000000F0F0F0F0,
+    0x0F0F0F0F00000000,
+    0xF0F0F0F000000000,
+)
+QUADRANT_OF = [QUADRANTS[(square // 32) * 2 + (square % 8) // 4] for square in range(64)]
+
+# Below this many empties the solver skips mobility ordering and uses parity only.
+FASTEST_FIRST_EMPTIES = 7
+# Positions with this many empties or fewer go through the allocation-free path.
+SMALL_EMPTIES = 4
+
+
+class EndgameSolver:
+    def __init__(self, stoppage=None):
+        """
+        Win/loss/draw and exact disc-difference solver.
+
+        Args:
+            stoppage (Stoppage): Optional stop flag; once it is set the solver unwinds
+                and its results must be discarded.
+        """
+        self.stoppage = stoppage
+        self.nodes = 0
+
+    def solve_root(self, game, exact=True):
+        """
+        Find the best move of a position by solving it to the end of the game.
+
+        Args:
+            game (OthelloGame): The position to solve.
+            exact (bool): True for the exact disc difference, False for a win/loss/draw search
+                that only guarantees the sign of the score.
+
+        Returns:
+            tuple: ``(score, move)`` from the point of view of the side to move, or
+            ``(None, None)`` if the search was stopped or there is no valid move.
+        """
+        own, opp = game.own_and_opponent_bits()
+        empties = 64 - popcount(own | opp)
+        alpha, beta = (-65, 65) if exact else (-1, 1)
+
+        best_score = None
+        best_move = None
+        for _, _, square, new_own, new_opp in self.ordered_children(own, opp, True):
+            score = -self.solve(new_opp, new_own, -beta, -alpha, empties - 1)
+            if self.stoppage is not None and self.stoppage.isStop():
+                return None, None
+            if best_score is None or score > best_score:
+                best_score = score
+                best_move = divmod(square, 8)
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        break
+        return best_score, best_move
+
+    def solve_wld(self, own, opp):
+        """
+        Solve a position for win (1), draw (0) or loss (-1) of the side to move.
+
+        Args:
+            own (int): Bitboard of the side to move.
+            opp (int): Bitboard of the opponent.
+        """
+        score = self.solve(own, opp, -1, 1, 64 - popcount(own | opp))
+        return (score > 0) - (score < 0)
+
+    def solve_exact(self, own, opp):
+        """
+        Solve a position for the final disc difference of the side to move.
+
+        Args:
+            own (int): Bitboard of the side to move.
+            opp (int): Bitboard of the opponent.
+        """
+        return self.solve(own, opp, -65, 65, 64 - popcount(own | opp))
+
+    def ordered_children(self, own, opp, fastest_first):
+        """
+        Generate the children of a position, sorted fastest-first (fewest opponent replies)
+        and then by parity (moves into quadrants with an odd number of empties first).
+
+        Returns:
+            list: ``(opponent_mobility, even_region, square, new_own, new_opp)`` tuples.
+        """
+        empty = ~(own | opp) & FULL_MASK
+        children = []
+        for square in iter_squares(legal_moves(own, opp)):
+            flipped = flips(own, opp, square)
+            new_own = own | flipped | (1 << square)
+            new_opp = opp ^ flipped
+            mobility = popcount(legal_moves(new_opp, new_own)) if fastest_first else 0
+            even_region = 1 - (popcount(empty & QUADRANT_OF[square]) & 1)
+            children.append((mobility, even_region, square, new_own, new_opp))
+        children.sort()
+        return children
+
+    def solve(self, own, opp, alpha, beta, empties):
+        """
+        Fail-soft negamax search to the end of the game.
+
+        Args:
+            own (int): Bitboard of the side to move.
+            opp (int): Bitboard of the opponent.
+            alpha (int): Lower bound of the window.
+            beta (int): Upper bound of the window.
+            empties (int): Number of empty squares.
+
+        Returns:
+            int: The disc difference for the side to move (exact when inside the window).
+        """
+        if empties <= SMALL_EMPTIES:
+            return self.solve_small(own, opp, alpha, beta, empties)
+        self.nodes += 1
+        if self.stoppage is not None and self.stoppage.isStop():
+            return 0
+
+        children = self.ordered_children(own, opp, empties > FASTEST_FIRST_EMPTIES)
+        if not children:
+            return popcount(own) - popcount(opp)
+
+        best_score = -65
+        for _, _, _, new_own, new_opp in children:
+            score = -self.solve(new_opp, new_own, -beta, -alpha, empties - 1)
+            if score > best_score:
+                best_score = score
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        break
+        return best_score
+
+    def solve_small(self, own, opp, alpha, beta, empties):
+        """
+        Allocation-free search for the last few empties: the empty squares are walked bit by
+        bit instead of building and sorting a move list, and the last empty is scored directly.
+        """
+        self.nodes += 1
+        empty = ~(own | opp) & FULL_MASK
+        if empties == 1:
+            square = empty.bit_length() - 1
+            flipped = flips(own, opp, square)
+            if not flipped:
+                return popcount(own) - popcount(opp)
+            count = popcount(flipped)
+            return popcount(own) + 2 * count + 1 - popcount(opp)
+
+        best_score = None
+        while empty:
+            bit = empty & -empty
+            empty ^= bit
+            flipped = flips(own, opp, bit.bit_length() - 1)
+            if not flipped:
+                continue
+            score = -self.solve_small(opp ^ flipped, own | flipped | bit, -beta, -alpha, empties - 1)
+            if best_score is None or score > best_score:
+                best_score = score
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        break
+        if best_score is None:
+            return popcount(own) - popcount(opp)
+        return best_score
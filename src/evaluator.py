@@ -1,43 +1,99 @@
-from config import BLACK, WHITE, EMPTY
+from config import BLACK, WHITE
+from itertools import chain
 import ast
+import os
+
+# Weight tables already parsed, by absolute path: (mtime, flat 64-entry table).
+_weight_tables = {}
+
+
+def load_location_weights(path):
+    """
+    Parse a location-weight file into a flat 64-entry table (index ``row * 8 + col``).
+
+    The file's first line is a Python list of 16 weights for the top-left 4x4 quadrant, row by row;
+    the other quadrants are its mirror images.
+
+    Args:
+        path (str): The weight file.
+
+    Returns:
+        list: The 64 square weights.
+
+    Raises:
+        FileNotFoundError: If the file does not exist.
+        ValueError: If the first line is not a list of 16 numbers.
+    """
+    try:
+        with open(path, "r") as f:
+            weightString = f.readline()
+    except FileNotFoundError:
+        raise FileNotFoundError(
+            f"Evaluator weight file {path!r} was not found; it must hold a list of 16 location weights."
+        ) from None
+    try:
+        weightArray = ast.literal_eval(weightString)
+    except (ValueError, SyntaxError):
+        weightArray = None
+    if not isinstance(weightArray, (list, tuple)) or len(weightArray) != 16:
+        raise ValueError(f"Evaluator weight file {path!r} must start with a list of 16 location weights.")
+
+    table = []
+    for i in range(8):
+        for j in range(8):
+            table.append(weightArray[4 * min(i, 7 - i) + min(j, 7 - j)])
+    return table
+
 
 class Evaluator(object):
     WIPEOUT_SCORE = 1000 
 
-    def get_location_weight(self, deltaBoard):
-      
-      try:
-          with open("input.txt", "r") as f:
-              weightString = f.readline()
-              weightArray = ast.literal_eval(weightString)
-      except FileNotFoundError:
-          print("The file input.txt was not found. Please ensure it exists in the correct directory.")
-          return 0  
-
-      weightBoard = [[0]*8 for _ in range(8)]
-      for i in range(0, 4):
-          for j in range(0, 4):
-              weightBoard[i][j] = weightArray[4*i+(j+1)-1]
-      for i in range(0, 4):
-          for j in range(4, 8):
-              weightBoard[i][j] = weightArray[4*i+(8-j)-1]
-      for i in range(4, 8):
-          for j in range(0, 4):
-              weightBoard[i][j] = weightArray[4*(7-i)+(j+1)-1]
-      for i in range(4, 8):
-          for j in range(4, 8):
-              weightBoard[i][j] = weightArray[4*(7-i)+(8-j)-1]
-
-      myScore = 0
-      yourScore = 0
-      for i in range(8):
-          for j in range(8):
-              if deltaBoard[i][j] == self.player:
-                  myScore += weightBoard[i][j]
-              elif deltaBoard[i][j] == self.enemy:
-                  yourScore += weightBoard[i][j]
-
-      return myScore - yourScore
+    def __init__(self, weights_path="input.txt"):
+        """
+        Args:
+            weights_path (str): The location-weight file (see ``load_location_weights``). It is read on first use
+                and again only when its modification time changes or ``reload`` is called; every Evaluator
+                reading the same file shares the parsed table.
+        """
+        self.weights_path = os.path.abspath(weights_path)
+
+    def reload(self):
+        """Re-read the weight file now."""
+        _weight_tables.pop(self.weights_path, None)
+        return self.location_weights()
+
+    def location_weights(self):
+        """
+        Returns:
+            list: The flat 64-entry weight table, re-read if the file changed since it was parsed.
+        """
+        try:
+            mtime = os.stat(self.weights_path).st_mtime_ns
+        except FileNotFoundError:
+            mtime = None  # load_location_weights raises the error
+        cached = _weight_tables.get(self.weights_path)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        table = load_location_weights(self.weights_path)
+        _weight_tables[self.weights_path] = (mtime, table)
+        return table
+
+    def get_location_weight(self, board):
+        """
+        Args:
+            board (list): An 8x8 board (``OthelloGame.board``).
+
+        Returns:
+            float: The location weights of the player's disks minus those of the enemy's.
+        """
+        weights = self.location_weights()
+        score = 0
+        for square, value in enumerate(chain.from_iterable(board)):
+            if value == self.player:
+                score += weights[square]
+            elif value == self.enemy:
+                score -= weights[square]
+        return score
 
     def score(self, startBoard, board, currentDepth, player, opponent):
         """ Determine the score of the given board for the specified player. """
@@ -54,6 +110,6 @@ class Evaluator(object):
         if (self.enemy == WHITE and whites == 0) or (self.enemy == BLACK and blacks == 0):
             return Evaluator.WIPEOUT_SCORE
 
-        sc += self.get_location_weight(deltaBoard)
+        sc += self.get_location_weight(board.board)
 
         return sc
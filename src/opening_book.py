@@ -0,0 +1,201 @@
+"""
+Opening book for the alpha-beta agent.
+
+The book maps positions to the move a deep offline search chose for them. Positions are stored
+in their canonical orientation (see ``bitboard.canonical``), so the 8 symmetric variants of a
+position share one entry, and the move is stored in that orientation too.
+
+The file is a 44-byte header (magic, version, entry count, name of the evaluation parameter set
+the book was searched with) followed by fixed-size records ``(own, opp, square, depth, score)``
+sorted by ``(own, opp)``. ``OpeningBook`` memory-maps it and finds positions by binary search, so
+opening it costs nothing and lookups read a few records. The agent only consults a book for the
+parameter set it was built with. Rebuild the shipped book with::
+
+    python opening_book.py --plies 6 --depth 7 --name Minimax-2
+"""
+import argparse
+import mmap
+import os
+import struct
+
+from bitboard import INVERSE_SYMMETRY_SQUARES, SYMMETRY_SQUARES, canonical
+
+OPENING_BOOK_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "opening_book.bin")
+MAGIC = b"OBK1"
+VERSION = 2
+# (magic, version, entry count, parameter set name as NUL-padded UTF-8)
+HEADER = struct.Struct("<4sII32s")
+RECORD = struct.Struct("<QQBBf")
+
+
+class OpeningBook:
+    def __init__(self, path=OPENING_BOOK_PATH):
+        """
+        A read-only, memory-mapped opening book. ``name`` is the evaluation parameter set its moves were
+        searched with.
+
+        Args:
+            path (str): The book file written by ``write_book``.
+
+        Raises:
+            ValueError: If the file is not an opening book.
+        """
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        with open(path, "rb") as f:
+            header = f.read(HEADER.size)
+            if len(header) < HEADER.size:
+                raise ValueError(f"{path} is not an opening book")
+            magic, version, self.count, name = HEADER.unpack(header)
+            if magic != MAGIC or version != VERSION:
+                raise ValueError(f"{path} is not a version {VERSION} opening book")
+            self.name = name.rstrip(b"\0").decode("utf-8")
+            if os.fstat(f.fileno()).st_size != HEADER.size + self.count * RECORD.size:
+                raise ValueError(f"{path} is truncated")
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if self.count else None
+
+    def __len__(self):
+        return self.count
+
+    def close(self):
+        """Unmap the file."""
+        if self.data is not None:
+            self.data.close()
+            self.data = None
+
+    def lookup(self, own, opp):
+        """
+        Find a canonical position.
+
+        Args:
+            own (int): Canonical bitboard of the side to move.
+            opp (int): Canonical bitboard of the opponent.
+
+        Returns:
+            tuple: ``(square, depth, score)`` with the square in canonical orientation, or None.
+        """
+        key = (own, opp)
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            record = RECORD.unpack_from(self.data, HEADER.size + middle * RECORD.size)
+            if record[:2] < key:
+                low = middle + 1
+            elif record[:2] > key:
+                high = middle
+            else:
+                return record[2:]
+        return None
+
+    def probe(self, game):
+        """
+        Look up the book move of a position.
+
+        Args:
+            game (OthelloGame): The current game state.
+
+        Returns:
+            tuple: The book move (row, col), or None if the position is not in the book.
+        """
+        own, opp = game.own_and_opponent_bits()
+        key_own, key_opp, symmetry = canonical(own, opp)
+        entry = self.lookup(key_own, key_opp) if self.count else None
+        if entry is None:
+            self.misses += 1
+            return None
+        square = INVERSE_SYMMETRY_SQUARES[symmetry][entry[0]]
+        if not game.get_valid_moves_bits() >> square & 1:  # only a corrupt book can get here
+            self.misses += 1
+            return None
+        self.hits += 1
+        return divmod(square, 8)
+
+
+def write_book(path, entries, ai_agent_name):
+    """
+    Write an opening book.
+
+    Args:
+        path (str): Output file.
+        entries (dict): ``(own, opp) -> (square, depth, score)`` with canonical keys and squares.
+        ai_agent_name (str): The evaluation parameter set the entries were searched with.
+
+    Raises:
+        ValueError: If the name does not fit in the header.
+    """
+    name = ai_agent_name.encode("utf-8")
+    if len(name) > HEADER.size - 12:
+        raise ValueError(f"parameter set name {ai_agent_name!r} is longer than {HEADER.size - 12} bytes")
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(entries), name))
+        for (own, opp), (square, depth, score) in sorted(entries.items()):
+            f.write(RECORD.pack(own, opp, square, depth, score))
+
+
+def build_book(path=OPENING_BOOK_PATH, ai_agent_name="Minimax-2", plies=6, depth=7, agent_options=None, log=print):
+    """
+    Build an opening book by searching every position reachable in ``plies`` moves from the start.
+
+    Each distinct canonical position is searched once with the alpha-beta agent to ``depth``; both
+    sides' replies are expanded, so the book answers whatever the opponent plays.
+
+    Args:
+        path (str): Output file.
+        ai_agent_name (str): The evaluation parameter set to search with.
+        plies (int): Depth of the opening tree, in moves from the starting position.
+        depth (int): Search depth per position.
+        agent_options (dict): Extra keyword arguments for the ai_agent doing the searches.
+        log (callable): Progress output.
+
+    Returns:
+        int: Number of positions written.
+    """
+    from ai_agent_alphabeta import ai_agent
+    from othello_game import OthelloGame
+    from Stoppage import Stoppage
+
+    agent = ai_agent(**dict(agent_options or {}, opening_book=None))
+    entries = {}
+    frontier = [OthelloGame()]
+    for ply in range(plies + 1):
+        next_frontier = []
+        for game in frontier:
+            own, opp = game.own_and_opponent_bits()
+            key_own, key_opp, symmetry = canonical(own, opp)
+            if (key_own, key_opp) in entries:
+                continue
+            valid_moves = game.get_valid_moves()
+            if not valid_moves:
+                continue
+            agent.new_search(game, ai_agent_name)
+            agent.reset_counters()
+            score, move, reached = agent.iterative_deepening(game, ai_agent_name, depth, Stoppage())
+            square = SYMMETRY_SQUARES[symmetry][move[0] * 8 + move[1]]
+            entries[(key_own, key_opp)] = (square, reached, score)
+            if ply < plies:
+                for valid_move in valid_moves:
+                    child = game.copy()
+                    child.make_move(*valid_move)
+                    next_frontier.append(child)
+        frontier = next_frontier
+        log(f"ply {ply}: {len(entries)} positions")
+    agent.close()
+    write_book(path, entries, ai_agent_name)
+    return len(entries)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the opening book of the alpha-beta agent.")
+    parser.add_argument("--plies", type=int, default=6, help="moves from the starting position to cover")
+    parser.add_argument("--depth", type=int, default=7, help="search depth per position")
+    parser.add_argument("--name", default="Minimax-2", help="evaluation parameter set")
+    parser.add_argument("--output", default=OPENING_BOOK_PATH)
+    args = parser.parse_args()
+
+    count = build_book(args.output, args.name, args.plies, args.depth)
+    print(f"wrote {count} positions to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
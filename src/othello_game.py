@@ -1,24 +1,167 @@
+from bitboard import (
+    CORNERS,
+    EDGES,
+    FULL_MASK,
+    flips,
+    from_rows,
+    iter_squares,
+    legal_moves,
+    popcount,
+    to_rows,
+)
+from config import DEBUG_FEATURES, DEBUG_HASH
+from patterns import flip_discs, pattern_indices, place_disc
+from zobrist import BLACK_KEYS, SIDE_KEY, WHITE_KEYS, compute_hash, flip_key
+
+
 class OthelloGame:
     def __init__(self, player_mode="friend"):
         """
         A class representing the Othello game board and its rules.
 
+        The position is stored as two bitboards (``black_bits`` and ``white_bits``);
+        ``board`` is a read-only 8x8 list view built from them for the GUI and
+        ``hash`` is the position's Zobrist key, kept up to date by every move.
+        ``disc_diff``, ``empty_count``, ``corner_sum`` and ``edge_sum`` are evaluation
+        features (Black minus White where it applies) updated by delta on every move.
+        ``pattern_indices`` is None unless ``track_patterns`` was called (see patterns.py).
+
         Args:
             player_mode (str): The mode of the game, either "friend" or "ai" (default is "friend").
         """
-        self.board = [[0 for _ in range(8)] for _ in range(8)]
-        self.board[3][3] = 1
-        self.board[3][4] = -1
-        self.board[4][3] = -1
-        self.board[4][4] = 1
+        self.black_bits = (1 << 27) | (1 << 36)  # (3, 3) and (4, 4)
+        self.white_bits = (1 << 28) | (1 << 35)  # (3, 4) and (4, 3)
         self.current_player = 1
         self.player_mode = player_mode
+        self.hash = compute_hash(self.black_bits, self.white_bits, self.current_player)
+        self.pattern_indices = None
+        self.reset_features()
+        self._board_key = None
+        self._board_view = None
+
+    @classmethod
+    def from_board(cls, board, current_player=1, player_mode="friend"):
+        """
+        Build a game from an 8x8 list-of-lists board.
+
+        Args:
+            board (list): The board to load (1 black, -1 white, 0 empty).
+            current_player (int): The side to move.
+            player_mode (str): The mode of the game.
+
+        Returns:
+            OthelloGame: The new game.
+        """
+        game = cls(player_mode=player_mode)
+        game.black_bits, game.white_bits = from_rows(board)
+        game.current_player = current_player
+        game.hash = compute_hash(game.black_bits, game.white_bits, current_player)
+        game.reset_features()
+        return game
+
+    @classmethod
+    def from_bits(cls, black_bits, white_bits, current_player=1, player_mode="friend"):
+        """
+        Build a game from a pair of bitboards.
+
+        Args:
+            black_bits (int): Bitboard of the black discs.
+            white_bits (int): Bitboard of the white discs.
+            current_player (int): The side to move.
+            player_mode (str): The mode of the game.
+
+        Returns:
+            OthelloGame: The new game.
+        """
+        game = cls(player_mode=player_mode)
+        game.black_bits = black_bits
+        game.white_bits = white_bits
+        game.current_player = current_player
+        game.hash = compute_hash(black_bits, white_bits, current_player)
+        game.reset_features()
+        return game
+
+    def copy(self):
+        """Return an independent copy of this game."""
+        game = OthelloGame.__new__(OthelloGame)
+        game.black_bits = self.black_bits
+        game.white_bits = self.white_bits
+        game.current_player = self.current_player
+        game.player_mode = self.player_mode
+        game.hash = self.hash
+        game.disc_diff = self.disc_diff
+        game.empty_count = self.empty_count
+        game.corner_sum = self.corner_sum
+        game.edge_sum = self.edge_sum
+        game.pattern_indices = list(self.pattern_indices) if self.pattern_indices is not None else None
+        game._board_key = None
+        game._board_view = None
+        return game
+
+    @property
+    def board(self):
+        """
+        Read-only 8x8 list view of the position (1 black, -1 white, 0 empty).
+
+        The view is rebuilt lazily whenever the bitboards change; editing it does not
+        change the game.
+        """
+        key = (self.black_bits, self.white_bits)
+        if self._board_key != key:
+            self._board_view = to_rows(self.black_bits, self.white_bits)
+            self._board_key = key
+        return self._board_view
+
+    def check_hash(self):
+        """
+        Recompute the Zobrist key from scratch and compare it with ``hash``.
+
+        Raises:
+            AssertionError: If the incrementally maintained key is out of date.
+        """
+        expected = compute_hash(self.black_bits, self.white_bits, self.current_player)
+        if self.hash != expected:
+            raise AssertionError(f"Zobrist hash mismatch: {self.hash:#x} != {expected:#x}")
+
+    def reset_features(self):
+        """Recompute the incrementally maintained evaluation features from the bitboards."""
+        black, white = self.black_bits, self.white_bits
+        self.disc_diff = popcount(black) - popcount(white)
+        self.empty_count = 64 - popcount(black | white)
+        self.corner_sum = popcount(black & CORNERS) - popcount(white & CORNERS)
+        self.edge_sum = popcount(black & EDGES) - popcount(white & EDGES)
+        if self.pattern_indices is not None:
+            self.pattern_indices = pattern_indices(black, white)
+
+    def track_patterns(self):
+        """Start maintaining the pattern indices (``pattern_indices``) on every move, if not already."""
+        if self.pattern_indices is None:
+            self.pattern_indices = pattern_indices(self.black_bits, self.white_bits)
+
+    def check_features(self):
+        """
+        Recompute the evaluation features from scratch and compare them with the incremental ones.
+
+        Raises:
+            AssertionError: If an incrementally maintained feature is out of date.
+        """
+        current = (self.disc_diff, self.empty_count, self.corner_sum, self.edge_sum, self.pattern_indices)
+        self.reset_features()
+        expected = (self.disc_diff, self.empty_count, self.corner_sum, self.edge_sum, self.pattern_indices)
+        if current != expected:
+            raise AssertionError(f"Evaluation features mismatch: {current} != {expected}")
+
+    def own_and_opponent_bits(self):
+        """Return the (side to move, opponent) bitboards."""
+        if self.current_player == 1:
+            return self.black_bits, self.white_bits
+        return self.white_bits, self.black_bits
 
     def count_stones(self):
         """Count the number of white, black, and empty stones on the board."""
-        whites = sum(row.count(1) for row in self.board)  # Count white stones
-        blacks = sum(row.count(-1) for row in self.board)  # Count black stones
-        empty = sum(row.count(0) for row in self.board)  # Count empty spaces
+        whites = popcount(self.black_bits)  # Count white stones
+        blacks = popcount(self.white_bits)  # Count black stones
+        empty = 64 - whites - blacks  # Count empty spaces
         return whites, blacks, empty
 
     def get_board(self):
@@ -37,10 +180,11 @@ class OthelloGame:
         if not isinstance(start_board, list) or not all(isinstance(row, list) for row in start_board):
             raise ValueError("start_board must be a 2D list representing the game board.")
 
+        board = self.board
         changes = []
         for r in range(8):
             for c in range(8):
-                if self.board[r][c] != start_board[r][c]:
+                if board[r][c] != start_board[r][c]:
                     changes.append((r, c))
         return changes
 
@@ -59,32 +203,8 @@ class OthelloGame:
       if not (0 <= row < 8 and 0 <= col < 8):
           return False
 
-      if self.board[row][col] != 0:
-          return False
-
-      # Check in all eight directions for opponent disks to flip
-      directions = [
-          (-1, -1), (-1, 0), (-1, 1),
-          (0, -1),         (0, 1),
-          (1, -1), (1, 0), (1, 1),
-      ]
-      for dr, dc in directions:
-          r, c = row + dr, col + dc
-          # Make sure the first step is within bounds and is an opponent's disk
-          if 0 <= r < 8 and 0 <= c < 8 and self.board[r][c] == -self.current_player:
-              # Continue checking in this direction
-              r += dr
-              c += dc
-              while 0 <= r < 8 and 0 <= c < 8:
-                  if self.board[r][c] == self.current_player:
-                      return True
-                  if self.board[r][c] == 0:
-                      break
-                  r += dr
-                  c += dc
-
-      return False
-
+      own, opp = self.own_and_opponent_bits()
+      return bool(legal_moves(own, opp) >> (row * 8 + col) & 1)
 
     def flip_disks(self, row, col):
         """
@@ -93,33 +213,24 @@ class OthelloGame:
         Args:
             row (int): The row index of the move.
             col (int): The column index of the move.
+
+        Returns:
+            int: The bitboard of the flipped disks.
         """
-        directions = [
-            (-1, -1),
-            (-1, 0),
-            (-1, 1),
-            (0, -1),
-            (0, 1),
-            (1, -1),
-            (1, 0),
-            (1, 1),
-        ]
-        for dr, dc in directions:
-            r, c = row + dr, col + dc
-            flip_list = []
-            while (
-                0 <= r < 8 and 0 <= c < 8 and self.board[r][c] == -self.current_player
-            ):
-                flip_list.append((r, c))
-                r += dr
-                c += dc
-                if (
-                    0 <= r < 8
-                    and 0 <= c < 8
-                    and self.board[r][c] == self.current_player
-                ):
-                    for fr, fc in flip_list:
-                        self.board[fr][fc] = self.current_player
+        own, opp = self.own_and_opponent_bits()
+        flipped = flips(own, opp, row * 8 + col)
+        if self.current_player == 1:
+            self.black_bits |= flipped
+            self.white_bits &= ~flipped
+        else:
+            self.white_bits |= flipped
+            self.black_bits &= ~flipped
+        self.hash ^= flip_key(flipped)
+        self.disc_diff += 2 * self.current_player * popcount(flipped)
+        self.edge_sum += 2 * self.current_player * popcount(flipped & EDGES)
+        if self.pattern_indices is not None:
+            flip_discs(self.pattern_indices, flipped, self.current_player)
+        return flipped
 
     def make_move(self, row, col):
         """
@@ -128,11 +239,77 @@ class OthelloGame:
         Args:
             row (int): The row index of the move.
             col (int): The column index of the move.
+
+        Returns:
+            tuple: An undo record ``(square, flipped, previous_player, previous_hash)``
+            to pass to ``unmake_move``, or None if the move was not valid.
         """
-        if self.is_valid_move(row, col):
-            self.board[row][col] = self.current_player
-            self.flip_disks(row, col)
-            self.current_player *= -1
+        if not (0 <= row < 8 and 0 <= col < 8):
+            return None
+
+        square = row * 8 + col
+        player = self.current_player
+        own, opp = self.own_and_opponent_bits()
+        if (own | opp) >> square & 1:
+            return None
+        flipped = flips(own, opp, square)
+        if not flipped:
+            return None
+
+        previous_hash = self.hash
+        if player == 1:
+            self.black_bits = own | flipped | (1 << square)
+            self.white_bits = opp ^ flipped
+            self.hash ^= BLACK_KEYS[square] ^ SIDE_KEY ^ flip_key(flipped)
+        else:
+            self.white_bits = own | flipped | (1 << square)
+            self.black_bits = opp ^ flipped
+            self.hash ^= WHITE_KEYS[square] ^ SIDE_KEY ^ flip_key(flipped)
+        self.current_player = -player
+
+        bit = 1 << square
+        self.disc_diff += player * (2 * popcount(flipped) + 1)
+        self.empty_count -= 1
+        if bit & CORNERS:  # corners are never flipped
+            self.corner_sum += player
+        self.edge_sum += player * (2 * popcount(flipped & EDGES) + (1 if bit & EDGES else 0))
+        if self.pattern_indices is not None:
+            place_disc(self.pattern_indices, square, player)
+            flip_discs(self.pattern_indices, flipped, player)
+
+        if DEBUG_HASH:
+            self.check_hash()
+        if DEBUG_FEATURES:
+            self.check_features()
+        return square, flipped, player, previous_hash
+
+    def unmake_move(self, record):
+        """
+        Restore the position in place to what it was before ``make_move``.
+
+        Args:
+            record (tuple): The undo record returned by ``make_move``.
+        """
+        square, flipped, player, previous_hash = record
+        placed = flipped | (1 << square)
+        if player == 1:
+            self.black_bits ^= placed
+            self.white_bits |= flipped
+        else:
+            self.white_bits ^= placed
+            self.black_bits |= flipped
+        self.current_player = player
+        self.hash = previous_hash
+
+        bit = 1 << square
+        self.disc_diff -= player * (2 * popcount(flipped) + 1)
+        self.empty_count += 1
+        if bit & CORNERS:
+            self.corner_sum -= player
+        self.edge_sum -= player * (2 * popcount(flipped & EDGES) + (1 if bit & EDGES else 0))
+        if self.pattern_indices is not None:
+            place_disc(self.pattern_indices, square, player, -1)
+            flip_discs(self.pattern_indices, flipped, player, -1)
 
     def is_game_over(self):
         """
@@ -141,9 +318,8 @@ class OthelloGame:
         Returns:
             bool: True if the game is over, False otherwise.
         """
-        return not self.get_valid_moves() or all(
-            all(cell != 0 for cell in row) for row in self.board
-        )
+        own, opp = self.own_and_opponent_bits()
+        return (own | opp) == FULL_MASK or not legal_moves(own, opp)
 
     def get_winner(self):
         """
@@ -152,8 +328,8 @@ class OthelloGame:
         Returns:
             int: The winner of the game (1 for Black, -1 for White, 0 for a tie).
         """
-        black_count = sum(row.count(1) for row in self.board)
-        white_count = sum(row.count(-1) for row in self.board)
+        black_count = popcount(self.black_bits)
+        white_count = popcount(self.white_bits)
 
         if black_count > white_count:
             return 1
@@ -162,6 +338,16 @@ class OthelloGame:
         else:
             return 0
 
+    def get_valid_moves_bits(self):
+        """
+        Get the valid moves for the current player as a bitboard.
+
+        Returns:
+            int: A bitboard with one bit set per valid move.
+        """
+        own, opp = self.own_and_opponent_bits()
+        return legal_moves(own, opp)
+
     def get_valid_moves(self):
         """
         Get a list of valid moves for the current player.
@@ -169,9 +355,5 @@ class OthelloGame:
         Returns:
             list: A list of valid moves represented as tuples (row, col).
         """
-        valid_moves = []
-        for row in range(8):
-            for col in range(8):
-                if self.is_valid_move(row, col):
-                    valid_moves.append((row, col))
-        return valid_moves
+        own, opp = self.own_and_opponent_bits()
+        return [divmod(square, 8) for square in iter_squares(legal_moves(own, opp))]
@@ -0,0 +1,332 @@
+"""
+Parallel searches for the alpha-beta agent.
+
+RootSplitSearch farms root moves out to a pool of worker processes, each holding its own ai_agent
+(and therefore its own transposition table). The first root move is searched alone with a full
+window (young brothers wait); the remaining moves are then submitted one at a time as workers free
+up, each with the best score found so far as its alpha bound. Ties go to the move on the lowest
+square, as in the single-process search, so a fixed-depth search returns the same score and move
+whatever the number of workers (``python parallel_search.py`` checks this on random positions).
+
+LazySMPSearch runs the agent's whole iterative deepening search in the main process and in every
+helper process at once. All of them share one SharedTranspositionTable, and helpers start one ply
+deeper on alternate workers and use perturbed history tables, so they explore the tree in a
+different order and fill the table with results the others can cut on.
+"""
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+import argparse
+import multiprocessing
+import random
+import sys
+import time
+
+from othello_game import OthelloGame
+from search_stats import COUNTER_NAMES
+from Stoppage import Stoppage
+from transposition import SharedTranspositionTable
+
+# Subtracted from the shared alpha so that a move tying the current best is still scored exactly
+# and the tie can be broken by square, which keeps the chosen move independent of the number of
+# workers. The single-process root searches of ai_agent do the same.
+TIE_MARGIN = 1e-6
+
+_worker_agent = None
+_worker_search_id = None
+_worker_stop_event = None
+
+
+def _init_worker(agent_options):
+    global _worker_agent
+    from ai_agent_alphabeta import ai_agent
+
+    _worker_agent = ai_agent(**agent_options)
+
+
+def _search_move_task(position, move, max_depth, ai_agent_name, alpha, time_left, search_id):
+    """
+    Search one root move in a worker process.
+
+    Returns:
+        tuple: ``(score, counters, stopped)`` where ``counters`` is the task's ``ai_agent.search_counters()``.
+    """
+    global _worker_search_id
+    agent = _worker_agent
+    game = OthelloGame.from_bits(*position)
+    agent.track_patterns(game, ai_agent_name)
+    if search_id != _worker_search_id:
+        agent.new_search(game, ai_agent_name)
+        _worker_search_id = search_id
+
+    stoppage = Stoppage(deadline=time.monotonic() + time_left)
+    agent.reset_counters()
+    score = agent.search_move(game, move, max_depth, stoppage, ai_agent_name, alpha)
+    return score, agent.search_counters(), stoppage.stop
+
+
+def _init_lazy_smp_worker(agent_options, table_name, stop_event):
+    global _worker_agent, _worker_stop_event
+    from ai_agent_alphabeta import ai_agent
+
+    _worker_agent = ai_agent(**agent_options)
+    _worker_agent.tt = SharedTranspositionTable(name=table_name)
+    _worker_stop_event = stop_event
+
+
+def _lazy_smp_task(position, ai_agent_name, max_depth, time_left, helper_index, first_move):
+    """
+    Run one Lazy SMP helper search in a worker process.
+
+    Returns:
+        tuple: ``(depth, score, move, counters)``: the helper's last completed iteration and its
+        ``ai_agent.search_counters()``.
+    """
+    agent = _worker_agent
+    game = OthelloGame.from_bits(*position)
+    agent.track_patterns(game, ai_agent_name)
+    agent.reset_ordering()
+    rng = random.Random(helper_index)
+    agent.history = [rng.randrange(8) for _ in range(64)]
+    agent.tt.new_search(60 - game.count_stones()[2])  # the main process owns (and clears) the table
+    agent.reset_counters()
+
+    stoppage = EventStoppage(_worker_stop_event, deadline=time.monotonic() + time_left)
+    first_depth = 1 + helper_index % 2
+    score, move, depth = agent.iterative_deepening(
+        game, ai_agent_name, max_depth, stoppage, first_depth, first_move=first_move
+    )
+    return depth, score, move, agent.search_counters()
+
+
+class EventStoppage(Stoppage):
+    def __init__(self, event, deadline=None, check_every=64) -> None:
+        """
+        A Stoppage that also stops once ``event`` (a ``multiprocessing.Event``) is set.
+        """
+        super().__init__(deadline, check_every)
+        self.event = event
+
+    def isStop(self):
+        if not self.stop and self.countdown == 1 and self.event.is_set():
+            self.stop = True
+        return super().isStop()
+
+
+class RootSplitSearch:
+    def __init__(self, workers, agent_options):
+        """
+        A process pool that searches the root moves of a position in parallel.
+
+        Args:
+            workers (int): Number of worker processes.
+            agent_options (dict): Keyword arguments for the ai_agent created in every worker.
+        """
+        self.workers = workers
+        self.agent_options = agent_options
+        self.executor = None
+        self.search_id = 0
+
+    def close(self):
+        """Shut the worker processes down."""
+        if self.executor is not None:
+            self.executor.shutdown(cancel_futures=True)
+            self.executor = None
+
+    def new_search(self):
+        """Start a new root position: workers age their tables (see ``ai_agent.new_search``) before their next task."""
+        self.search_id += 1
+
+    def search_root(self, game, moves, max_depth, ai_agent_name, deadline):
+        """
+        Search the ordered root moves to ``max_depth`` in parallel.
+
+        Args:
+            game (OthelloGame): The current game state.
+            moves (list): The ordered root moves; the first one is searched before the others.
+            max_depth (int): The search depth of this iteration.
+            ai_agent_name (str): The evaluation parameter set.
+            deadline (float): ``time.monotonic()`` value at which the search must stop.
+
+        Returns:
+            tuple: ``(score, move, completed, counters)``, ``counters`` summing the workers' search counters. The move is the root move on the lowest
+            square among those with the best score, so the result depends neither on the number of
+            workers nor on the move order. If the iteration was interrupted, ``move`` is the best of the
+            moves searched to completion, or None if the first move did not finish.
+        """
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(
+                max_workers=self.workers, initializer=_init_worker, initargs=(self.agent_options,)
+            )
+        position = (game.black_bits, game.white_bits, game.current_player, game.player_mode)
+
+        def submit(index, alpha):
+            time_left = deadline - time.monotonic()
+            future = self.executor.submit(
+                _search_move_task, position, moves[index], max_depth, ai_agent_name, alpha, time_left, self.search_id
+            )
+            pending[future] = (index, alpha)
+
+        pending = {}
+        submit(0, float("-inf"))
+        best_score = float("-inf")
+        best_index = None
+        counters = dict.fromkeys(COUNTER_NAMES, 0)
+        next_index = 1
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                index, alpha = pending.pop(future)
+                score, task_counters, stopped = future.result()
+                for name, value in task_counters.items():
+                    counters[name] += value
+                if stopped:
+                    for other in pending:
+                        other.cancel()
+                    move = moves[best_index] if best_index is not None else None
+                    return best_score, move, False, counters
+                if score > alpha and (score > best_score or (score == best_score and moves[index] < moves[best_index])):
+                    best_score = score
+                    best_index = index
+            while next_index < len(moves) and len(pending) < self.workers:
+                submit(next_index, best_score - TIE_MARGIN)
+                next_index += 1
+        return best_score, moves[best_index], True, counters
+
+
+class LazySMPSearch:
+    def __init__(self, workers, agent_options, table_name):
+        """
+        Helper processes for a Lazy SMP search sharing one transposition table.
+
+        Args:
+            workers (int): Total number of searching processes, including the main one.
+            agent_options (dict): Keyword arguments for the ai_agent created in every helper.
+            table_name (str): Name of the SharedTranspositionTable the helpers attach to.
+        """
+        self.helpers = workers - 1
+        self.agent_options = agent_options
+        self.table_name = table_name
+        self.stop_event = multiprocessing.Event()
+        self.executor = None
+
+    def close(self):
+        """Shut the helper processes down."""
+        if self.executor is not None:
+            self.stop_event.set()
+            self.executor.shutdown(cancel_futures=True)
+            self.executor = None
+
+    def search(self, agent, game, ai_agent_name, max_depth, stoppage, first_move=None, first_depth=1):
+        """
+        Search ``game`` with ``agent`` in this process while the helpers search it too.
+
+        Args:
+            agent (ai_agent): The main agent; its ``tt`` must be the shared table.
+            game (OthelloGame): The current game state.
+            ai_agent_name (str): The evaluation parameter set.
+            max_depth (int): The maximum search depth.
+            stoppage (Stoppage): The main search's stop flag; helpers share its deadline.
+            first_move (tuple): The move to search first, if any.
+            first_depth (int): The depth of the main process's first iteration.
+
+        Returns:
+            tuple: ``(score, move, depth)`` of the deepest completed iteration across all processes.
+        """
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(
+                max_workers=self.helpers,
+                initializer=_init_lazy_smp_worker,
+                initargs=(self.agent_options, self.table_name, self.stop_event),
+            )
+        self.stop_event.clear()
+        position = (game.black_bits, game.white_bits, game.current_player, game.player_mode)
+        time_left = stoppage.deadline - time.monotonic()
+        futures = [
+            self.executor.submit(_lazy_smp_task, position, ai_agent_name, max_depth, time_left, index, first_move)
+            for index in range(1, self.helpers + 1)
+        ]
+
+        score, move, depth = agent.iterative_deepening(
+            game, ai_agent_name, max_depth, stoppage, first_depth, first_move=first_move
+        )
+        self.stop_event.set()
+        for future in futures:
+            helper_depth, helper_score, helper_move, counters = future.result()
+            agent.add_worker_counters(counters)
+            if helper_depth > depth:
+                score, move, depth = helper_score, helper_move, helper_depth
+        return score, move, depth
+
+
+def check_worker_agreement(game, ai_agent_name, depth, worker_counts=(2, 3, 4), agent_options=None):
+    """
+    Search a position to a fixed depth in one process and with each number of root-split workers, every time with
+    a fresh agent, and compare the results.
+
+    Args:
+        game (OthelloGame): The position; it must have at least two valid moves.
+        ai_agent_name (str): The evaluation parameter set.
+        depth (int): The search depth.
+        worker_counts (tuple): Numbers of worker processes to compare with the single-process search.
+        agent_options (dict): Extra keyword arguments for the ai_agents.
+
+    Returns:
+        tuple: The ``(score, move)`` all searches agree on.
+
+    Raises:
+        AssertionError: If a parallel search returns another score or move.
+    """
+    from ai_agent_alphabeta import ai_agent
+
+    options = dict({"opening_book": None, "endgame_empties": 0, "wld_empties": 0}, **(agent_options or {}))
+    results = {}
+    for workers in (1,) + tuple(worker_counts):
+        agent = ai_agent(workers=workers, **options)
+        try:
+            move = agent.search_position(game.copy(), ai_agent_name, depth, Stoppage(deadline=time.monotonic() + 3600))
+            results[workers] = (agent.iterations[-1]["score"], move)
+        finally:
+            agent.close()
+    for workers, result in results.items():
+        if result != results[1]:
+            raise AssertionError(f"{workers} workers returned {result}, one process {results[1]}")
+    return results[1]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Check that the parallel root search agrees with the single-process search at a fixed depth."
+    )
+    parser.add_argument("--positions", type=int, default=10, help="random positions to search")
+    parser.add_argument("--depth", type=int, default=5)
+    parser.add_argument("--workers", type=int, nargs="+", default=[2, 3, 4], help="worker counts to compare")
+    parser.add_argument("--name", default="Minimax-2", help="evaluation parameter set")
+    parser.add_argument("--algorithm", default="alphabeta", help="search algorithm of the agents")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    failures = 0
+    checked = 0
+    while checked < args.positions:
+        game = OthelloGame()
+        for _ in range(rng.randint(4, 40)):
+            valid_moves = game.get_valid_moves()
+            if not valid_moves:
+                break
+            game.make_move(*rng.choice(valid_moves))
+        if len(game.get_valid_moves()) < 2:
+            continue
+        checked += 1
+        try:
+            score, move = check_worker_agreement(game, args.name, args.depth, args.workers,
+                                                 {"algorithm": args.algorithm})
+            print(f"position {checked}: {score} {move}")
+        except AssertionError as error:
+            failures += 1
+            print(f"position {checked}: {error}")
+    print(f"{checked - failures}/{checked} positions agree")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
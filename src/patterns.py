@@ -0,0 +1,337 @@
+"""
+Pattern-based evaluation.
+
+A pattern is a fixed set of squares; its configuration in a position is a ternary index (digit 0
+empty, 1 black, 2 white, the pattern's ``i``-th square weighing ``3 ** i``). Every pattern family
+(edge + 2 X-squares, 3x3 and 2x5 corners, rows/columns 2-4, diagonals of length 4 to 8) is laid
+on the board in all its symmetric positions, and the instances of a family share one weight
+table per game phase. A position's score is the sum of one table entry per instance, from
+Black's point of view.
+
+``OthelloGame.track_patterns`` makes the game keep the 46 instance indices up to date on every
+move, so evaluating costs 46 list lookups. The weights live in a binary file: a header
+``(magic, version, phase count, family count)`` followed, phase by phase and family by family, by
+little-endian float32 tables in which configurations that are mirror images of each other within
+the same instance (a line read backwards, a corner transposed) share one slot. Write a starting
+table, equivalent to a disc-square evaluation, with::
+
+    python patterns.py --phases 4
+
+and fit the tables to recorded games with training.py.
+"""
+import argparse
+import os
+import struct
+import sys
+from array import array
+from operator import getitem
+
+from bitboard import SYMMETRY_SQUARES
+
+PATTERN_WEIGHTS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "pattern_weights.bin")
+MAGIC = b"PAT1"
+VERSION = 1
+HEADER = struct.Struct("<4sIII")
+
+# (name, squares of one instance); the other instances are its images under the 8 board symmetries.
+FAMILIES = (
+    ("edge_2x", (0, 1, 2, 3, 4, 5, 6, 7, 9, 14)),
+    ("corner_2x5", (0, 1, 2, 3, 4, 8, 9, 10, 11, 12)),
+    ("corner_3x3", (0, 1, 2, 8, 9, 10, 16, 17, 18)),
+    ("line_2", tuple(range(8, 16))),
+    ("line_3", tuple(range(16, 24))),
+    ("line_4", tuple(range(24, 32))),
+    ("diagonal_8", (0, 9, 18, 27, 36, 45, 54, 63)),
+    ("diagonal_7", (1, 10, 19, 28, 37, 46, 55)),
+    ("diagonal_6", (2, 11, 20, 29, 38, 47)),
+    ("diagonal_5", (3, 12, 21, 30, 39)),
+    ("diagonal_4", (4, 13, 22, 31)),
+)
+
+# Classic disc-square values, in discs, used to seed the tables.
+SEED_SQUARE_VALUES = (
+    10.0, -2.0, 1.0, 0.5, 0.5, 1.0, -2.0, 10.0,
+    -2.0, -5.0, -0.2, -0.2, -0.2, -0.2, -5.0, -2.0,
+    1.0, -0.2, 0.1, 0.1, 0.1, 0.1, -0.2, 1.0,
+    0.5, -0.2, 0.1, 0.0, 0.0, 0.1, -0.2, 0.5,
+    0.5, -0.2, 0.1, 0.0, 0.0, 0.1, -0.2, 0.5,
+    1.0, -0.2, 0.1, 0.1, 0.1, 0.1, -0.2, 1.0,
+    -2.0, -5.0, -0.2, -0.2, -0.2, -0.2, -5.0, -2.0,
+    10.0, -2.0, 1.0, 0.5, 0.5, 1.0, -2.0, 10.0,
+)
+
+
+def _instances(squares):
+    """
+    Lay a pattern on the board in every symmetric position.
+
+    Returns:
+        tuple: ``(instances, mirror)``: the distinct square tuples, and the permutation of pattern positions
+        that maps the pattern onto its own squares (position ``i`` goes to ``mirror[i]``), or None if no
+        symmetry other than the identity does.
+    """
+    instances = []
+    seen = set()
+    mirror = None
+    for symmetry in range(8):
+        image = tuple(SYMMETRY_SQUARES[symmetry][square] for square in squares)
+        if frozenset(image) == frozenset(squares) and image != squares and mirror is None:
+            mirror = tuple(squares.index(square) for square in image)
+        if frozenset(image) not in seen:
+            seen.add(frozenset(image))
+            instances.append(image)
+    return instances, mirror
+
+
+def _slots(size, mirror):
+    """
+    Number the configurations of a pattern so that mirror images share a slot.
+
+    Returns:
+        tuple: ``(slot_of, slot_count)`` where ``slot_of[index]`` is the compact slot of a configuration.
+    """
+    count = 3 ** size
+    if mirror is None:
+        return range(count), count
+    slot_of = array("i", [-1]) * count
+    slot_count = 0
+    for index in range(count):
+        if slot_of[index] >= 0:
+            continue
+        mirrored = 0
+        value = index
+        for position in range(size):
+            value, digit = divmod(value, 3)
+            mirrored += digit * 3 ** mirror[position]
+        slot_of[index] = slot_of[mirrored] = slot_count
+        slot_count += 1
+    return slot_of, slot_count
+
+
+INSTANCES = []  # square tuples of every instance
+INSTANCE_FAMILY = []  # family number of every instance
+MIRRORS = []  # self-symmetry of every family (see ``_instances``)
+for _family, (_name, _squares) in enumerate(FAMILIES):
+    _family_instances, _mirror = _instances(_squares)
+    INSTANCES.extend(_family_instances)
+    INSTANCE_FAMILY.extend([_family] * len(_family_instances))
+    MIRRORS.append(_mirror)
+
+# SQUARE_PATTERNS[square] lists the (instance, power of 3) pairs the square contributes to.
+SQUARE_PATTERNS = [[] for _ in range(64)]
+for _instance, _squares in enumerate(INSTANCES):
+    for _position, _square in enumerate(_squares):
+        SQUARE_PATTERNS[_square].append((_instance, 3 ** _position))
+SQUARE_PATTERNS = [tuple(pairs) for pairs in SQUARE_PATTERNS]
+
+
+def pattern_indices(black_bits, white_bits):
+    """
+    Compute the index of every pattern instance from scratch.
+
+    Args:
+        black_bits (int): Bitboard of the black discs.
+        white_bits (int): Bitboard of the white discs.
+
+    Returns:
+        list: One ternary index per entry of ``INSTANCES``.
+    """
+    indices = [0] * len(INSTANCES)
+    for square in range(64):
+        digit = (black_bits >> square & 1) + 2 * (white_bits >> square & 1)
+        if digit:
+            for instance, power in SQUARE_PATTERNS[square]:
+                indices[instance] += digit * power
+    return indices
+
+
+def place_disc(indices, square, player, sign=1):
+    """
+    Update the indices for a disc of ``player`` (1 black, -1 white) put on an empty square (``sign`` 1) or taken
+    back off it (``sign`` -1).
+    """
+    delta = sign if player == 1 else 2 * sign
+    for instance, power in SQUARE_PATTERNS[square]:
+        indices[instance] += delta * power
+
+
+def flip_discs(indices, flipped, player, sign=1):
+    """
+    Update the indices for the discs of ``flipped`` turning to ``player``'s colour (``sign`` 1) or back (``sign``
+    -1).
+    """
+    delta = -sign if player == 1 else sign  # white (2) to black (1) lowers each digit by one
+    while flipped:
+        low = flipped & -flipped
+        for instance, power in SQUARE_PATTERNS[low.bit_length() - 1]:
+            indices[instance] += delta * power
+        flipped ^= low
+
+
+def phase_of(empty_count, phase_count):
+    """Return the game phase (0 for the opening) of a position with ``empty_count`` empty squares."""
+    return min(phase_count - 1, (60 - empty_count) * phase_count // 61) if empty_count <= 60 else 0
+
+
+def family_slots():
+    """Return ``(slot_of, slot_count)`` of every family (see ``_slots``): where each configuration is stored."""
+    return [_slots(len(squares), mirror) for (_, squares), mirror in zip(FAMILIES, MIRRORS)]
+
+
+def compact_sizes():
+    """Return the number of stored slots of every family's table."""
+    return [slot_count for _, slot_count in family_slots()]
+
+
+def write_weights(path, phases):
+    """
+    Write a pattern weight file.
+
+    Args:
+        path (str): Output file.
+        phases (list): One list per phase of one compact table (sequence of floats, see ``compact_sizes``)
+            per family.
+    """
+    sizes = compact_sizes()
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(phases), len(FAMILIES)))
+        for tables in phases:
+            for table, size in zip(tables, sizes):
+                if len(table) != size:
+                    raise ValueError(f"expected a table of {size} weights, got {len(table)}")
+                data = array("f", table)
+                if sys.byteorder != "little":
+                    data.byteswap()
+                f.write(data.tobytes())
+
+
+def read_weights(path):
+    """
+    Read a pattern weight file and expand its tables to one entry per configuration.
+
+    Args:
+        path (str): The file written by ``write_weights``.
+
+    Returns:
+        list: One list per phase of one ``array('f')`` per family, indexed by configuration.
+
+    Raises:
+        ValueError: If the file is not a pattern weight file for the current pattern set.
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    if len(data) < HEADER.size:
+        raise ValueError(f"{path} is not a pattern weight file")
+    magic, version, phase_count, family_count = HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"{path} is not a version {VERSION} pattern weight file")
+    if family_count != len(FAMILIES) or phase_count == 0:
+        raise ValueError(f"{path} holds {family_count} pattern families, expected {len(FAMILIES)}")
+    slots = family_slots()
+    sizes = [slot_count for _, slot_count in slots]
+    if len(data) != HEADER.size + 4 * phase_count * sum(sizes):
+        raise ValueError(f"{path} is truncated")
+
+    offset = HEADER.size
+    phases = []
+    for _ in range(phase_count):
+        tables = []
+        for slot_of, size in slots:
+            compact = array("f")
+            compact.frombytes(data[offset:offset + 4 * size])
+            if sys.byteorder != "little":
+                compact.byteswap()
+            offset += 4 * size
+            tables.append(compact if isinstance(slot_of, range) else array("f", map(compact.__getitem__, slot_of)))
+        phases.append(tables)
+    return phases
+
+
+# Weight files already read, by absolute path: (mtime, phases).
+_loaded_weights = {}
+
+
+class PatternEvaluator:
+    def __init__(self, path=PATTERN_WEIGHTS_PATH):
+        """
+        Score positions with pattern weight tables.
+
+        The file is read once; every PatternEvaluator of the same unchanged file shares the tables.
+
+        Args:
+            path (str): The weight file (see ``write_weights``).
+        """
+        self.path = os.path.abspath(path)
+        mtime = os.stat(self.path).st_mtime_ns
+        cached = _loaded_weights.get(self.path)
+        if cached is None or cached[0] != mtime:
+            cached = (mtime, read_weights(self.path))
+            _loaded_weights[self.path] = cached
+        self.phase_count = len(cached[1])
+        # Per phase, the table of every instance, in ``INSTANCES`` order.
+        self.instance_tables = [[tables[family] for family in INSTANCE_FAMILY] for tables in cached[1]]
+        self.phase_by_empties = [phase_of(empty_count, self.phase_count) for empty_count in range(65)]
+
+    def evaluate(self, game):
+        """
+        Evaluate a position.
+
+        Args:
+            game (OthelloGame): The position; with ``track_patterns`` on its indices are read, not recomputed.
+
+        Returns:
+            float: The score for the side to move.
+        """
+        indices = game.pattern_indices
+        if indices is None:
+            indices = pattern_indices(game.black_bits, game.white_bits)
+        tables = self.instance_tables[self.phase_by_empties[game.empty_count]]
+        return game.current_player * sum(map(getitem, tables, indices))
+
+
+def seed_weights(phase_count):
+    """
+    Build tables that reproduce a disc-square evaluation.
+
+    Each square's value is shared equally among the instances covering it; the values move from
+    ``SEED_SQUARE_VALUES`` in the opening to one per disc in the last phase.
+
+    Returns:
+        list: One list of compact tables per phase, for ``write_weights``.
+    """
+    coverage = [len(pairs) for pairs in SQUARE_PATTERNS]
+    phases = []
+    for phase in range(phase_count):
+        share = phase / (phase_count - 1) if phase_count > 1 else 0.0
+        values = [((1 - share) * SEED_SQUARE_VALUES[square] + share) / coverage[square] for square in range(64)]
+        tables = []
+        for (_, squares), mirror in zip(FAMILIES, MIRRORS):
+            slot_of, slot_count = _slots(len(squares), mirror)
+            table = [0.0] * slot_count
+            for index in range(3 ** len(squares)):
+                score = 0.0
+                value = index
+                for square in squares:
+                    value, digit = divmod(value, 3)
+                    if digit == 1:
+                        score += values[square]
+                    elif digit == 2:
+                        score -= values[square]
+                table[slot_of[index]] = score
+            tables.append(table)
+        phases.append(tables)
+    return phases
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write disc-square starting tables for the pattern evaluator.")
+    parser.add_argument("--phases", type=int, default=4, help="number of game phases")
+    parser.add_argument("--output", default=PATTERN_WEIGHTS_PATH)
+    args = parser.parse_args()
+
+    write_weights(args.output, seed_weights(args.phases))
+    print(f"wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""
+Persistent position cache shared across games and processes.
+
+Root search results (``depth, bound, score, move``) are kept in a local SQLite database keyed by
+the position's Zobrist hash and a ``kind``: the evaluation parameter set for heuristic searches,
+or "exact"/"wld" for the endgame solver. SQLite handles concurrent readers and writers, so any
+number of agents and worker processes can share one file. Entries carry a last-used timestamp;
+once the table grows past ``max_entries`` the least recently used ones are evicted. Probes only
+read: the hits are remembered in memory and their timestamps written in one batch with the next
+``store`` (or on ``flush``/``close``), so a lookup never takes SQLite's write lock.
+"""
+import sqlite3
+import time
+
+from transposition import EXACT
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS positions (
+    key INTEGER NOT NULL,
+    kind TEXT NOT NULL,
+    depth INTEGER NOT NULL,
+    bound INTEGER NOT NULL,
+    score REAL NOT NULL,
+    square INTEGER NOT NULL,
+    last_used REAL NOT NULL,
+    PRIMARY KEY (key, kind)
+);
+CREATE INDEX IF NOT EXISTS positions_last_used ON positions (last_used);
+"""
+# Fraction of ``max_entries`` freed at once when the cache is full.
+EVICT_FRACTION = 0.1
+
+
+def _signed(key):
+    """SQLite integers are signed 64-bit: map an unsigned Zobrist key into that range."""
+    return key - (1 << 64) if key >= 1 << 63 else key
+
+
+class PositionCache:
+    def __init__(self, path, max_entries=1_000_000):
+        """
+        Open (or create) a position cache.
+
+        Args:
+            path (str): The SQLite database file.
+            max_entries (int): Number of entries above which the least recently used are evicted.
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self.connection = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.executescript(SCHEMA)
+        self.connection.commit()
+        self.count = self.connection.execute("SELECT COUNT(*) FROM positions").fetchone()[0]
+        # (key, kind) -> time of the last hit not yet written to ``last_used``
+        self.used = {}
+        self.reset_stats()
+
+    def reset_stats(self):
+        """Zero the probe/hit/store/eviction counters."""
+        self.probes = 0
+        self.hits = 0
+        self.stores = 0
+        self.evictions = 0
+
+    def stats(self):
+        """
+        Returns:
+            dict: probes, hits, stores, evictions, the number of entries and the hit rate.
+        """
+        return {
+            "probes": self.probes,
+            "hits": self.hits,
+            "stores": self.stores,
+            "evictions": self.evictions,
+            "entries": self.count,
+            "hit_rate": self.hits / self.probes if self.probes else 0.0,
+        }
+
+    def close(self):
+        """Write the pending recency updates and close the database."""
+        if self.connection is not None:
+            self.flush()
+            self.connection.close()
+            self.connection = None
+
+    def flush(self):
+        """Write the last-used time of the entries hit since the last write, in one transaction."""
+        if self.used:
+            with self.connection:
+                self.write_used()
+
+    def write_used(self):
+        """Queue the pending recency updates in the current transaction."""
+        self.connection.executemany(
+            "UPDATE positions SET last_used = ? WHERE key = ? AND kind = ?",
+            [(used, key, kind) for (key, kind), used in self.used.items()],
+        )
+        self.used = {}
+
+    def probe(self, key, kind):
+        """
+        Look up a position and mark it as recently used (written with the next ``store`` or ``flush``).
+
+        Args:
+            key (int): The position's Zobrist hash.
+            kind (str): The evaluation parameter set, or "exact"/"wld" for endgame results.
+
+        Returns:
+            tuple: ``(depth, bound, score, move)``, or None on a miss.
+        """
+        self.probes += 1
+        row = self.connection.execute(
+            "SELECT depth, bound, score, square FROM positions WHERE key = ? AND kind = ?", (_signed(key), kind)
+        ).fetchone()
+        if row is None:
+            return None
+        self.hits += 1
+        self.used[_signed(key), kind] = time.time()
+        depth, bound, score, square = row
+        return depth, bound, score, divmod(square, 8)
+
+    def store(self, key, kind, depth, score, move, bound=EXACT):
+        """
+        Save a search result, unless a deeper one is already cached, together with the pending recency updates.
+
+        Args:
+            key (int): The position's Zobrist hash.
+            kind (str): The evaluation parameter set, or "exact"/"wld" for endgame results.
+            depth (int): The depth searched.
+            score (float): The search score.
+            move (tuple): The best move (row, col).
+            bound (int): EXACT, LOWER or UPPER.
+        """
+        self.stores += 1
+        with self.connection:
+            if self.used:
+                self.write_used()
+            cursor = self.connection.execute(
+                "INSERT INTO positions VALUES (?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (key, kind) DO UPDATE SET depth = excluded.depth, bound = excluded.bound, "
+                "score = excluded.score, square = excluded.square, last_used = excluded.last_used "
+                "WHERE excluded.depth >= positions.depth",
+                (_signed(key), kind, depth, bound, score, move[0] * 8 + move[1], time.time()),
+            )
+            self.count += cursor.rowcount  # counts updates too; ``evict`` recounts
+            if self.count > self.max_entries:
+                self.evict()
+
+    def evict(self):
+        """If the cache is over its cap, drop the least recently used entries to get ``EVICT_FRACTION`` below it."""
+        count = self.connection.execute("SELECT COUNT(*) FROM positions").fetchone()[0]
+        if count > self.max_entries:
+            excess = count - int(self.max_entries * (1 - EVICT_FRACTION))
+            self.connection.execute(
+                "DELETE FROM positions WHERE rowid IN (SELECT rowid FROM positions ORDER BY last_used LIMIT ?)",
+                (excess,),
+            )
+            self.evictions += excess
+            count -= excess
+        self.count = count
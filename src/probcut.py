@@ -0,0 +1,163 @@
+"""
+Multi-ProbCut parameters for the alpha-beta agent.
+
+For a node searched to depth ``d`` the score of a shallow search to depth ``d'`` predicts the deep
+score as ``deep ~ slope * shallow + offset``, with residuals of standard deviation ``sigma``. When
+the shallow score says the deep one is more than ``threshold`` sigmas outside the window, the node
+is cut without the deep search. Several shallow depths can be listed per deep depth; they are
+tried in order.
+
+The parameters are fitted per evaluation parameter set and stored in ``mpc_params.json``. Refit
+them with::
+
+    python probcut.py --positions 100 --max-depth 6
+
+which searches random positions to every depth up to ``--max-depth`` and fits each depth pair by
+least squares.
+"""
+import argparse
+import json
+import math
+import os
+import random
+
+MPC_PARAMS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "mpc_params.json")
+DEFAULT_THRESHOLD = 1.5
+# Shallow depths are the deep depth minus these, so both searches end on the same side to move.
+DEPTH_GAPS = (2, 4)
+MIN_DEEP_DEPTH = 3
+
+
+def load_mpc_params(path=MPC_PARAMS_PATH):
+    """
+    Read a Multi-ProbCut parameter file.
+
+    Args:
+        path (str): The JSON file written by ``calibrate``.
+
+    Returns:
+        tuple: ``(threshold, params)`` where ``params[ai_agent_name][depth]`` is a list of
+        ``(shallow_depth, slope, offset, sigma)`` tuples.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    params = {}
+    for ai_agent_name, depths in data["params"].items():
+        params[ai_agent_name] = {
+            int(depth): [(pair["shallow"], pair["slope"], pair["offset"], pair["sigma"]) for pair in pairs]
+            for depth, pairs in depths.items()
+        }
+    return data.get("threshold", DEFAULT_THRESHOLD), params
+
+
+def random_position(rng, min_plies=4, max_plies=44):
+    """Play a random number of random moves from the start; return None if the game ended first."""
+    from othello_game import OthelloGame
+
+    game = OthelloGame()
+    for _ in range(rng.randint(min_plies, max_plies)):
+        valid_moves = game.get_valid_moves()
+        if not valid_moves:
+            return None
+        game.make_move(*rng.choice(valid_moves))
+    return game if game.get_valid_moves() else None
+
+
+def fit_pair(samples):
+    """
+    Least-squares fit of ``deep = slope * shallow + offset``.
+
+    Args:
+        samples (list): ``(shallow_score, deep_score)`` pairs.
+
+    Returns:
+        tuple: ``(slope, offset, sigma)``, or None if the shallow scores do not vary.
+    """
+    n = len(samples)
+    mean_x = sum(x for x, _ in samples) / n
+    mean_y = sum(y for _, y in samples) / n
+    var_x = sum((x - mean_x) ** 2 for x, _ in samples)
+    if var_x == 0:
+        return None
+    slope = sum((x - mean_x) * (y - mean_y) for x, y in samples) / var_x
+    offset = mean_y - slope * mean_x
+    sigma = math.sqrt(sum((y - slope * x - offset) ** 2 for x, y in samples) / n)
+    return slope, offset, sigma
+
+
+def calibrate(positions=100, max_depth=6, seed=0, ai_agent_names=None, threshold=DEFAULT_THRESHOLD, log=print):
+    """
+    Fit Multi-ProbCut parameters by searching random positions with the plain alpha-beta search.
+
+    Args:
+        positions (int): Number of random positions per evaluation parameter set.
+        max_depth (int): Deepest search to fit.
+        seed (int): Seed of the position generator.
+        ai_agent_names (list): Evaluation parameter sets to fit (all of them by default).
+        threshold (float): Cut threshold, in sigmas, written to the file.
+        log (callable): Progress output.
+
+    Returns:
+        dict: The file contents, ready for ``json.dump``.
+    """
+    from ai_agent_alphabeta import ai_agent
+    from Stoppage import Stoppage
+
+    agent = ai_agent()
+    rng = random.Random(seed)
+    ai_agent_names = ai_agent_names or list(agent.evaluation_params)
+    params = {}
+    for ai_agent_name in ai_agent_names:
+        scores = []
+        while len(scores) < positions:
+            game = random_position(rng)
+            if game is None:
+                continue
+            maximizing_player = rng.random() < 0.5  # sample max and min nodes alike
+            agent.tt.clear()
+            agent.reset_ordering()
+            scores.append([
+                agent.alphabeta(game, depth, Stoppage(), ai_agent_name, maximizing_player)[0]
+                for depth in range(max_depth + 1)
+            ])
+        log(f"{ai_agent_name}: searched {positions} positions to depth {max_depth}")
+
+        depths = {}
+        for deep in range(MIN_DEEP_DEPTH, max_depth + 1):
+            pairs = []
+            for gap in DEPTH_GAPS:
+                shallow = deep - gap
+                if shallow < 1:
+                    continue
+                fit = fit_pair([(row[shallow], row[deep]) for row in scores])
+                if fit is None or fit[0] <= 0:
+                    continue
+                slope, offset, sigma = fit
+                pairs.append({"shallow": shallow, "slope": slope, "offset": offset, "sigma": sigma})
+                log(f"  {shallow} -> {deep}: slope {slope:.3f} offset {offset:.3f} sigma {sigma:.3f}")
+            if pairs:
+                pairs.sort(key=lambda pair: pair["shallow"])
+                depths[str(deep)] = pairs
+        params[ai_agent_name] = depths
+    return {"threshold": threshold, "positions": positions, "seed": seed, "params": params}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Refit the Multi-ProbCut parameters of the alpha-beta agent.")
+    parser.add_argument("--positions", type=int, default=100, help="random positions per parameter set")
+    parser.add_argument("--max-depth", type=int, default=6, help="deepest search to fit")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="cut threshold in sigmas")
+    parser.add_argument("--name", action="append", help="evaluation parameter set to fit (repeatable)")
+    parser.add_argument("--output", default=MPC_PARAMS_PATH)
+    args = parser.parse_args()
+
+    data = calibrate(args.positions, args.max_depth, args.seed, args.name, args.threshold)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+        f.write("\n")
+    print(f"wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""
+Per-move search statistics reported by the agents.
+
+Every agent's ``get_best_move(..., return_stats=True)`` returns ``(move, SearchStats)``.
+The counters behind a SearchStats are plain integer/float attributes bumped by the
+agents while they search, so collecting them costs two ``perf_counter`` calls per move
+generation and per evaluation. A ``JsonLinesSink`` appends one record per move to a file.
+"""
+import json
+import time
+
+# Counters an agent accumulates during a search; worker processes send them back as a dict.
+COUNTER_NAMES = (
+    "nodes",
+    "leaf_evals",
+    "expanded_nodes",
+    "moves_generated",
+    "beta_cutoffs",
+    "tt_probes",
+    "tt_hits",
+    "movegen_seconds",
+    "eval_seconds",
+    "probcut_cuts",
+    "book_hits",
+    "cache_hits",
+    "reduced_searches",
+    "reduction_re_searches",
+    "saved_evaluations",
+)
+
+
+class SearchStats:
+    def __init__(self, agent, ai_agent_name=None, move=None, depth=0, seconds=0.0, iterations=None, **counters):
+        """
+        Statistics of one ``get_best_move`` call.
+
+        Args:
+            agent (str): The agent class that searched.
+            ai_agent_name (str): The evaluation parameter set, if any.
+            move (tuple): The move played, or None.
+            depth (int): The depth of the last completed iteration.
+            seconds (float): Wall-clock time of the whole call.
+            iterations (list): One ``{"depth", "seconds", "nodes", "score"}`` dict per completed
+                iteration (generation, for the genetic agent), with cumulative times and nodes.
+            **counters: Any of ``COUNTER_NAMES``; missing ones are 0.
+        """
+        self.agent = agent
+        self.ai_agent_name = ai_agent_name
+        self.move = move
+        self.depth = depth
+        self.seconds = seconds
+        self.iterations = iterations or []
+        for name in COUNTER_NAMES:
+            setattr(self, name, counters.get(name, 0))
+
+    @property
+    def nps(self):
+        """Nodes searched per second."""
+        return self.nodes / self.seconds if self.seconds > 0 else 0.0
+
+    @property
+    def branching_factor(self):
+        """Average number of valid moves at the nodes that were expanded."""
+        return self.moves_generated / self.expanded_nodes if self.expanded_nodes else 0.0
+
+    @property
+    def effective_branching_factor(self):
+        """Node count of the last completed iteration divided by that of the one before it."""
+        if len(self.iterations) < 2:
+            return 0.0
+        previous = self.iterations[-2]["nodes"]
+        last = self.iterations[-1]["nodes"] - previous
+        return last / previous if previous else 0.0
+
+    @property
+    def cutoff_rate(self):
+        """Fraction of the expanded nodes that ended in a beta cutoff."""
+        return self.beta_cutoffs / self.expanded_nodes if self.expanded_nodes else 0.0
+
+    @property
+    def tt_hit_rate(self):
+        """Fraction of transposition-table probes that found the position."""
+        return self.tt_hits / self.tt_probes if self.tt_probes else 0.0
+
+    def as_dict(self):
+        """
+        Returns:
+            dict: Every field and derived rate, JSON-serialisable.
+        """
+        record = {
+            "agent": self.agent,
+            "ai_agent_name": self.ai_agent_name,
+            "move": list(self.move) if self.move is not None else None,
+            "depth": self.depth,
+            "seconds": self.seconds,
+        }
+        for name in COUNTER_NAMES:
+            record[name] = getattr(self, name)
+        record.update(
+            nps=self.nps,
+            branching_factor=self.branching_factor,
+            effective_branching_factor=self.effective_branching_factor,
+            cutoff_rate=self.cutoff_rate,
+            tt_hit_rate=self.tt_hit_rate,
+            iterations=self.iterations,
+        )
+        return record
+
+    def __repr__(self):
+        return (
+            f"SearchStats(agent={self.agent!r}, move={self.move}, depth={self.depth}, nodes={self.nodes}, "
+            f"nps={self.nps:.0f}, seconds={self.seconds:.3f})"
+        )
+
+
+class JsonLinesSink:
+    def __init__(self, target):
+        """
+        Append SearchStats records to a JSON-lines file.
+
+        Args:
+            target (str or file): A path (opened in append mode) or an open text file.
+        """
+        if isinstance(target, str):
+            self.file = open(target, "a", encoding="utf-8")
+            self.owns_file = True
+        else:
+            self.file = target
+            self.owns_file = False
+
+    def write(self, stats):
+        """Write one SearchStats as a line of JSON, stamped with the current time."""
+        record = stats.as_dict()
+        record["timestamp"] = time.time()
+        self.file.write(json.dumps(record) + "\n")
+        self.file.flush()
+
+    def close(self):
+        """Close the file if the sink opened it."""
+        if self.owns_file and not self.file.closed:
+            self.file.close()
+
+
+def make_sink(stats_sink):
+    """Return ``stats_sink`` as a JsonLinesSink (None, a path, an open file or an existing sink)."""
+    if stats_sink is None or isinstance(stats_sink, JsonLinesSink):
+        return stats_sink
+    return JsonLinesSink(stats_sink)
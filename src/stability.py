@@ -0,0 +1,194 @@
+"""
+Stable-disc detection on bitboards, shared by every agent's evaluation.
+
+A disc is stable when no sequence of moves can ever flip it. ``stable_discs`` finds a
+conservative (never over-counting) set of them in three steps:
+
+* edges are looked up in ``EDGE_STABILITY``, a table indexed by the eight-square
+  configuration of the edge that holds the discs that stay put whatever is played on it
+  (an edge disc can only be flipped along its own edge);
+* a disc every one of whose four lines (row, column and both diagonals) is full can
+  never be flipped;
+* stability then propagates through the board interior: a disc is stable once, along
+  each of the four line directions, its line is full or one of its two neighbours on
+  that line is a stable disc of the same colour.
+"""
+from bitboard import popcount
+
+A_FILE = 0x0101010101010101
+FIRST_ROW = 0x00000000000000FF
+# Squares that are neither edges nor corners; only these are reached by propagation.
+INTERIOR = 0x007E7E7E7E7E7E00
+
+
+def _line(row, col, d_row, d_col):
+    bits = 0
+    while 0 <= row < 8 and 0 <= col < 8:
+        bits |= 1 << (row * 8 + col)
+        row += d_row
+        col += d_col
+    return bits
+
+
+ROW_LINES = tuple(_line(row, 0, 0, 1) for row in range(8))
+COLUMN_LINES = tuple(_line(0, col, 1, 0) for col in range(8))
+DIAGONAL_LINES = tuple(_line(0, col, 1, 1) for col in range(8)) + tuple(_line(row, 0, 1, 1) for row in range(1, 8))
+ANTI_DIAGONAL_LINES = tuple(_line(0, col, 1, -1) for col in range(8)) + tuple(
+    _line(row, 7, 1, -1) for row in range(1, 8)
+)
+
+
+def _place_on_edge(own, opp, x):
+    """Play ``own`` on square ``x`` of an 8-square line and return the new (own, opp) pair."""
+    own |= 1 << x
+    for step in (1, -1):
+        run = 0
+        i = x + step
+        while 0 <= i < 8 and opp >> i & 1:
+            run |= 1 << i
+            i += step
+        if 0 <= i < 8 and own >> i & 1:
+            own |= run
+            opp ^= run
+    return own, opp
+
+
+def _edge_stable(own, opp, memo):
+    """
+    Return the discs of ``own`` that survive every sequence of discs played on the empty
+    squares of the line. Any empty square may receive a disc of either colour, because on
+    the full board a move there can be legal through another direction.
+    """
+    key = own << 8 | opp
+    stable = memo.get(key)
+    if stable is not None:
+        return stable
+    stable = own
+    empty = ~(own | opp) & 0xFF
+    x = 0
+    while empty and stable:
+        if empty & 1:
+            new_own, new_opp = _place_on_edge(own, opp, x)
+            stable &= _edge_stable(new_own, new_opp, memo)
+            new_opp, new_own = _place_on_edge(opp, own, x)
+            stable &= _edge_stable(new_own, new_opp, memo)
+        empty >>= 1
+        x += 1
+    memo[key] = stable
+    return stable
+
+
+def _edge_stability_table():
+    memo = {}
+    table = [0] * (1 << 16)
+    for own in range(256):
+        opp = 0xFF & ~own
+        # Walk every subset of the squares not held by ``own``.
+        subset = opp
+        while True:
+            table[own << 8 | subset] = _edge_stable(own, subset, memo)
+            if not subset:
+                break
+            subset = (subset - 1) & opp
+    return table
+
+
+# EDGE_STABILITY[own << 8 | opp] is the set of stable ``own`` discs of an 8-square edge.
+EDGE_STABILITY = _edge_stability_table()
+
+# Column index (bit i = row i) <-> A-file bitboard.
+A_FILE_OF = [sum(1 << (i * 8) for i in range(8) if index >> i & 1) for index in range(256)]
+
+
+def _a_file_index(bits):
+    """Gather the A-file of ``bits`` into an 8-bit index (bit i = row i)."""
+    return (((bits & A_FILE) * 0x0102040810204080) >> 56) & 0xFF
+
+
+def edge_stable_discs(own, opp):
+    """
+    Return the stable ``own`` discs on the four edges.
+
+    Args:
+        own (int): Bitboard of the side whose stable discs are wanted.
+        opp (int): Bitboard of the other side.
+    """
+    stable = EDGE_STABILITY[(own & FIRST_ROW) << 8 | (opp & FIRST_ROW)]
+    stable |= EDGE_STABILITY[(own >> 56) << 8 | (opp >> 56)] << 56
+    stable |= A_FILE_OF[EDGE_STABILITY[_a_file_index(own) << 8 | _a_file_index(opp)]]
+    stable |= A_FILE_OF[EDGE_STABILITY[_a_file_index(own >> 7) << 8 | _a_file_index(opp >> 7)]] << 7
+    return stable
+
+
+def full_lines(occupied, lines):
+    """Return the union of the ``lines`` that are completely ``occupied``."""
+    full = 0
+    for line in lines:
+        if occupied & line == line:
+            full |= line
+    return full
+
+
+def stable_discs(own, opp):
+    """
+    Find the stable discs of one side.
+
+    Args:
+        own (int): Bitboard of the side whose stable discs are wanted.
+        opp (int): Bitboard of the other side.
+
+    Returns:
+        int: A bitboard of stable ``own`` discs (a subset of the truly stable ones).
+    """
+    if not own:
+        return 0
+    occupied = own | opp
+    full_h = full_lines(occupied, ROW_LINES)
+    full_v = full_lines(occupied, COLUMN_LINES)
+    full_d = full_lines(occupied, DIAGONAL_LINES)
+    full_a = full_lines(occupied, ANTI_DIAGONAL_LINES)
+
+    stable = edge_stable_discs(own, opp) | (own & full_h & full_v & full_d & full_a)
+    candidates = own & INTERIOR & ~stable
+    while candidates:
+        # Interior squares have all eight neighbours on the board, so no wrap masks are needed.
+        new = (
+            candidates
+            & (full_h | stable >> 1 | stable << 1)
+            & (full_v | stable >> 8 | stable << 8)
+            & (full_d | stable >> 9 | stable << 9)
+            & (full_a | stable >> 7 | stable << 7)
+        )
+        if not new:
+            break
+        stable |= new
+        candidates ^= new
+    return stable
+
+
+def count_stable_discs(own, opp):
+    """
+    Count the stable discs of one side.
+
+    Args:
+        own (int): Bitboard of the side whose stable discs are counted.
+        opp (int): Bitboard of the other side.
+
+    Returns:
+        int: The number of stable ``own`` discs.
+    """
+    return popcount(stable_discs(own, opp))
+
+
+def stable_disc_difference(own, opp):
+    """
+    The stability feature of the agents' evaluations.
+
+    Args:
+        own (int): Bitboard of the side the feature is computed for.
+        opp (int): Bitboard of the other side.
+
+    Returns:
+        int: The number of stable ``own`` discs minus the number of stable ``opp`` discs.
+    """
+    return count_stable_discs(own, opp) - count_stable_discs(opp, own)
@@ -0,0 +1,503 @@
+"""
+Offline training of the evaluation weights.
+
+The pipeline has three stages, each streaming its input so that millions of positions never
+have to fit in memory:
+
+1. ``record`` plays self-play games and appends every position with its label to a position
+   file: the final disc difference, or the exact score from the endgame solver for positions
+   with few enough empty squares. Any other source can write the same format with
+   ``PositionWriter``.
+2. ``extract`` turns the positions into a feature matrix file, written in bounded chunks and
+   read back through ``mmap``. A "features" matrix holds the five features weighted by the
+   alpha-beta agent's parameter sets; a "patterns" matrix holds the table slot of every pattern
+   instance (see patterns.py).
+3. ``fit`` reads the matrix chunk by chunk and fits one set of weights per game phase:
+   least squares (accumulated normal equations) for the features, SGD for the pattern tables.
+   Feature weights are written to a versioned JSON file that ``ai_agent`` loads at startup as
+   extra evaluation parameter sets; pattern tables are written in the pattern weight format.
+
+The matrices are plain float32 files rather than NumPy arrays, which the project does not
+depend on. For example::
+
+    python training.py record --games 2000 positions.bin
+    python training.py extract --kind features positions.bin features.fmx
+    python training.py fit --kind features --name Trained features.fmx
+"""
+import argparse
+import json
+import mmap
+import os
+import random
+import struct
+import sys
+from array import array
+
+from patterns import INSTANCE_FAMILY, PATTERN_WEIGHTS_PATH, family_slots, pattern_indices, phase_of, seed_weights
+
+EVALUATION_WEIGHTS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "evaluation_weights.json")
+WEIGHTS_FORMAT = "othello-evaluation-weights"
+WEIGHTS_VERSION = 1
+
+POSITIONS_MAGIC = b"POS1"
+# (black bits, white bits, side to move, score for the side to move)
+POSITION = struct.Struct("<QQbf")
+MATRIX_MAGIC = b"FMX1"
+# (magic, columns, rows); the float32 rows follow in native byte order, flagged by ``sys.byteorder``.
+MATRIX_HEADER = struct.Struct("<4s6sxxII")
+# Every matrix row starts with the empty-square count and the label; the features follow.
+LABEL_COLUMNS = 2
+MATRIX_KINDS = ("features", "patterns")
+CHUNK_ROWS = 65536
+
+
+def load_evaluation_weights(path=EVALUATION_WEIGHTS_PATH):
+    """
+    Read a trained weight file.
+
+    Args:
+        path (str): The JSON file written by ``fit_features``.
+
+    Returns:
+        dict: Evaluation parameter sets by name, each ``{"phase_weights": [weights of each phase]}``.
+
+    Raises:
+        ValueError: If the file is not a version ``WEIGHTS_VERSION`` weight file.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if data.get("format") != WEIGHTS_FORMAT or data.get("version") != WEIGHTS_VERSION:
+        raise ValueError(f"{path} is not a version {WEIGHTS_VERSION} evaluation weight file")
+    return {name: {"phase_weights": phases} for name, phases in data["params"].items()}
+
+
+class PositionWriter:
+    def __init__(self, path, append=True):
+        """
+        Write labelled positions to a position file.
+
+        Args:
+            path (str): The file; a new one starts with the ``POSITIONS_MAGIC`` header.
+            append (bool): False to start the file over.
+        """
+        new_file = not append or not os.path.exists(path) or os.path.getsize(path) == 0
+        self.file = open(path, "wb" if not append else "ab")
+        if new_file:
+            self.file.write(POSITIONS_MAGIC)
+        self.count = 0
+
+    def write(self, black_bits, white_bits, player, score):
+        """Append one position with its score for the side to move."""
+        self.file.write(POSITION.pack(black_bits, white_bits, player, score))
+        self.count += 1
+
+    def close(self):
+        self.file.close()
+
+
+def read_positions(path, chunk_size=CHUNK_ROWS):
+    """
+    Stream the positions of a position file.
+
+    Args:
+        path (str): The file written by ``PositionWriter``.
+        chunk_size (int): Positions read per block.
+
+    Yields:
+        tuple: ``(black_bits, white_bits, player, score)``.
+
+    Raises:
+        ValueError: If the file is not a position file.
+    """
+    with open(path, "rb") as f:
+        if f.read(len(POSITIONS_MAGIC)) != POSITIONS_MAGIC:
+            raise ValueError(f"{path} is not a position file")
+        while True:
+            block = f.read(chunk_size * POSITION.size)
+            if not block:
+                return
+            if len(block) % POSITION.size:
+                raise ValueError(f"{path} is truncated")
+            yield from POSITION.iter_unpack(block)
+
+
+def record_games(path, games, ai_agent_name="Minimax-2", depth=2, random_plies=8, epsilon=0.1, solve_empties=12,
+                 seed=0, log=print):
+    """
+    Play self-play games and append their positions to a position file.
+
+    Every game opens with ``random_plies`` random moves, then the alpha-beta agent plays both sides to ``depth``,
+    with a random move instead once in a while. Positions are labelled with the final disc difference for the
+    side to move, or with the exact endgame score when at most ``solve_empties`` squares are empty.
+
+    Args:
+        path (str): The position file, appended to.
+        games (int): Number of games.
+        ai_agent_name (str): The evaluation parameter set the players search with.
+        depth (int): Search depth of the players.
+        random_plies (int): Random moves at the start of each game.
+        epsilon (float): Probability of a random move afterwards.
+        solve_empties (int): Label positions with this many empty squares or fewer by solving them.
+        seed (int): Seed of the random moves.
+        log (callable): Progress output.
+
+    Returns:
+        int: Number of positions written.
+    """
+    from ai_agent_alphabeta import ai_agent
+    from endgame import EndgameSolver
+    from othello_game import OthelloGame
+    from Stoppage import Stoppage
+
+    rng = random.Random(seed)
+    trained = EVALUATION_WEIGHTS_PATH if os.path.exists(EVALUATION_WEIGHTS_PATH) else None
+    agent = ai_agent(tt_size_mb=4, opening_book=None, evaluation_weights=trained)
+    solver = EndgameSolver()
+    writer = PositionWriter(path)
+    for game_number in range(games):
+        game = OthelloGame()
+        positions = []
+        while True:
+            valid_moves = game.get_valid_moves()
+            if not valid_moves:
+                break
+            positions.append((game.black_bits, game.white_bits, game.current_player, game.empty_count))
+            if len(positions) <= random_plies or rng.random() < epsilon:
+                move = rng.choice(valid_moves)
+            else:
+                agent.new_search(game, ai_agent_name)
+                move = agent.iterative_deepening(game, ai_agent_name, depth, Stoppage())[1]
+            game.make_move(*move)
+        final_diff = game.disc_diff
+        for black_bits, white_bits, player, empty_count in positions:
+            if empty_count <= solve_empties:
+                own, opp = (black_bits, white_bits) if player == 1 else (white_bits, black_bits)
+                score = solver.solve_exact(own, opp)
+            else:
+                score = player * final_diff
+            writer.write(black_bits, white_bits, player, score)
+        if (game_number + 1) % 100 == 0:
+            log(f"{game_number + 1} games, {writer.count} positions")
+    writer.close()
+    agent.close()
+    return writer.count
+
+
+class MatrixWriter:
+    def __init__(self, path, columns):
+        """
+        Write a float32 matrix row by row, holding at most one chunk in memory.
+
+        Args:
+            path (str): Output file.
+            columns (int): Values per row.
+        """
+        self.file = open(path, "wb")
+        self.columns = columns
+        self.rows = 0
+        self.buffer = array("f")
+        self.file.write(MATRIX_HEADER.pack(MATRIX_MAGIC, sys.byteorder.encode()[:6], columns, 0))
+
+    def append(self, row):
+        self.buffer.extend(row)
+        self.rows += 1
+        if len(self.buffer) >= CHUNK_ROWS * self.columns:
+            self.flush()
+
+    def flush(self):
+        self.buffer.tofile(self.file)
+        self.buffer = array("f")
+
+    def close(self):
+        """Write the remaining rows and the row count."""
+        self.flush()
+        self.file.seek(0)
+        self.file.write(MATRIX_HEADER.pack(MATRIX_MAGIC, sys.byteorder.encode()[:6], self.columns, self.rows))
+        self.file.close()
+
+
+class MatrixReader:
+    def __init__(self, path):
+        """
+        Memory-map a matrix written by ``MatrixWriter``.
+
+        Raises:
+            ValueError: If the file is not a matrix in this machine's byte order.
+        """
+        self.file = open(path, "rb")
+        header = self.file.read(MATRIX_HEADER.size)
+        if len(header) < MATRIX_HEADER.size:
+            raise ValueError(f"{path} is not a feature matrix")
+        magic, byteorder, self.columns, self.rows = MATRIX_HEADER.unpack(header)
+        if magic != MATRIX_MAGIC or byteorder.rstrip(b"\0") != sys.byteorder.encode()[:6]:
+            raise ValueError(f"{path} is not a feature matrix written on a {sys.byteorder}-endian machine")
+        if os.fstat(self.file.fileno()).st_size != MATRIX_HEADER.size + 4 * self.columns * self.rows:
+            raise ValueError(f"{path} is truncated")
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ) if self.rows else None
+
+    def chunks(self, chunk_rows=CHUNK_ROWS, order=None):
+        """
+        Yield the matrix in blocks of rows.
+
+        Args:
+            chunk_rows (int): Rows per block.
+            order (random.Random): Shuffle the order of the blocks with this generator.
+
+        Yields:
+            array: The float values of up to ``chunk_rows`` rows, row after row.
+        """
+        starts = list(range(0, self.rows, chunk_rows))
+        if order is not None:
+            order.shuffle(starts)
+        row_size = 4 * self.columns
+        for start in starts:
+            values = array("f")
+            values.frombytes(self.data[MATRIX_HEADER.size + start * row_size:
+                                       MATRIX_HEADER.size + min(start + chunk_rows, self.rows) * row_size])
+            yield values
+
+    def close(self):
+        if self.data is not None:
+            self.data.close()
+        self.file.close()
+
+
+def extract_features(positions_path, matrix_path, kind="features"):
+    """
+    Build the feature matrix of a position file.
+
+    A "features" row is ``(empty squares, score for the side to move, *ai_agent.evaluation_features)``. A
+    "patterns" row is ``(empty squares, score for Black, slot of every pattern instance)``, the slot being the
+    configuration's position in its family's compact table.
+
+    Args:
+        positions_path (str): The position file.
+        matrix_path (str): Output matrix file.
+        kind (str): "features" or "patterns".
+
+    Returns:
+        int: Number of rows written.
+    """
+    from ai_agent_alphabeta import EVALUATION_FEATURES, ai_agent
+    from othello_game import OthelloGame
+
+    if kind not in MATRIX_KINDS:
+        raise ValueError(f"kind must be one of {MATRIX_KINDS}, got {kind!r}")
+    if kind == "features":
+        agent = ai_agent(tt_size_mb=1, opening_book=None, evaluation_weights=None)
+        writer = MatrixWriter(matrix_path, LABEL_COLUMNS + len(EVALUATION_FEATURES))
+        for black_bits, white_bits, player, score in read_positions(positions_path):
+            game = OthelloGame.from_bits(black_bits, white_bits, player)
+            writer.append((game.empty_count, score) + agent.evaluation_features(game))
+        agent.close()
+    else:
+        instance_slots = [slot_of for slot_of, _ in (family_slots()[family] for family in INSTANCE_FAMILY)]
+        writer = MatrixWriter(matrix_path, LABEL_COLUMNS + len(INSTANCE_FAMILY))
+        for black_bits, white_bits, player, score in read_positions(positions_path):
+            empty_count = 64 - bin(black_bits | white_bits).count("1")
+            indices = pattern_indices(black_bits, white_bits)
+            writer.append([empty_count, player * score] + [slot_of[index] for slot_of, index in zip(instance_slots, indices)])
+    writer.close()
+    return writer.rows
+
+
+def solve_linear(matrix, vector):
+    """Solve ``matrix * x = vector`` by Gaussian elimination with partial pivoting (small dense systems)."""
+    size = len(vector)
+    rows = [list(matrix[i]) + [vector[i]] for i in range(size)]
+    for column in range(size):
+        pivot = max(range(column, size), key=lambda row: abs(rows[row][column]))
+        rows[column], rows[pivot] = rows[pivot], rows[column]
+        if rows[column][column] == 0:
+            continue
+        for row in range(size):
+            if row != column and rows[row][column]:
+                factor = rows[row][column] / rows[column][column]
+                rows[row] = [a - factor * b for a, b in zip(rows[row], rows[column])]
+    return [rows[i][size] / rows[i][i] if rows[i][i] else 0.0 for i in range(size)]
+
+
+def fit_features(matrix_path, phase_count=4, ridge=1.0, chunk_rows=CHUNK_ROWS):
+    """
+    Least-squares fit of the feature weights, one set per phase.
+
+    The normal equations of each phase are summed over the matrix chunk by chunk, so memory does not
+    grow with the number of positions; ``ridge`` regularises phases with few or collinear samples.
+
+    Args:
+        matrix_path (str): A "features" matrix.
+        phase_count (int): Number of game phases (see ``patterns.phase_of``).
+        ridge (float): L2 penalty added to the diagonal.
+        chunk_rows (int): Rows read per block.
+
+    Returns:
+        tuple: ``(phase_weights, errors, counts)``: per phase, a weight dict keyed by ``EVALUATION_FEATURES``, the
+        root-mean-square error of the fit and the number of positions.
+    """
+    from ai_agent_alphabeta import EVALUATION_FEATURES
+
+    size = len(EVALUATION_FEATURES)
+    reader = MatrixReader(matrix_path)
+    if reader.columns != LABEL_COLUMNS + size:
+        raise ValueError(f"{matrix_path} is not a features matrix")
+    products = [[[0.0] * size for _ in range(size)] for _ in range(phase_count)]
+    targets = [[0.0] * size for _ in range(phase_count)]
+    squares = [0.0] * phase_count
+    counts = [0] * phase_count
+    phase_by_empties = [phase_of(empty_count, phase_count) for empty_count in range(65)]
+    width = reader.columns
+    for chunk in reader.chunks(chunk_rows):
+        for start in range(0, len(chunk), width):
+            row = chunk[start:start + width].tolist()
+            phase = phase_by_empties[int(row[0])]
+            score = row[1]
+            features = row[LABEL_COLUMNS:]
+            product = products[phase]
+            for i, value in enumerate(features):
+                if value:
+                    product_row = product[i]
+                    for j, other in enumerate(features):
+                        product_row[j] += value * other
+                    targets[phase][i] += value * score
+            squares[phase] += score * score
+            counts[phase] += 1
+    reader.close()
+
+    phase_weights = []
+    errors = []
+    for phase in range(phase_count):
+        product = [[value + (ridge if i == j else 0.0) for j, value in enumerate(row)]
+                   for i, row in enumerate(products[phase])]
+        weights = solve_linear(product, targets[phase])
+        # Residual sum of squares from the normal equations: y'y - 2 w'X'y + w'X'Xw.
+        residual = squares[phase] - 2 * sum(w * t for w, t in zip(weights, targets[phase])) + sum(
+            weights[i] * weights[j] * products[phase][i][j] for i in range(size) for j in range(size)
+        )
+        phase_weights.append(dict(zip(EVALUATION_FEATURES, weights)))
+        errors.append((max(residual, 0.0) / counts[phase]) ** 0.5 if counts[phase] else 0.0)
+    return phase_weights, errors, counts
+
+
+def write_evaluation_weights(path, name, phase_weights, **details):
+    """
+    Add (or replace) a parameter set in a trained weight file, keeping the other sets in it.
+
+    Args:
+        path (str): The JSON weight file.
+        name (str): Name of the parameter set, as passed to ``get_best_move``.
+        phase_weights (list): One weight dict per phase.
+        **details: How the set was obtained (number of positions, games...), recorded for reference.
+    """
+    data = {"format": WEIGHTS_FORMAT, "version": WEIGHTS_VERSION, "params": {}, "details": {}}
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            existing = json.load(f)
+        if existing.get("format") == WEIGHTS_FORMAT and existing.get("version") == WEIGHTS_VERSION:
+            data = existing
+    data["params"][name] = phase_weights
+    data.setdefault("details", {})[name] = details
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+        f.write("\n")
+
+
+def fit_patterns(matrix_path, phase_count=4, epochs=3, learning_rate=0.01, chunk_rows=CHUNK_ROWS, seed=0, log=print):
+    """
+    Fit the pattern tables by stochastic gradient descent on the squared error, one set of tables per phase.
+
+    The tables start from ``patterns.seed_weights``, so configurations never seen in training keep their
+    disc-square values. Each epoch visits the matrix chunks in a new random order.
+
+    Args:
+        matrix_path (str): A "patterns" matrix.
+        phase_count (int): Number of game phases.
+        epochs (int): Passes over the matrix.
+        learning_rate (float): Step size; each of the instances of a row moves by ``learning_rate * error``.
+        chunk_rows (int): Rows read per block.
+        seed (int): Seed of the chunk order.
+        log (callable): Progress output.
+
+    Returns:
+        list: Compact tables per phase, for ``patterns.write_weights``.
+    """
+    reader = MatrixReader(matrix_path)
+    if reader.columns != LABEL_COLUMNS + len(INSTANCE_FAMILY):
+        raise ValueError(f"{matrix_path} is not a patterns matrix")
+    phases = [[array("f", table) for table in tables] for tables in seed_weights(phase_count)]
+    phase_by_empties = [phase_of(empty_count, phase_count) for empty_count in range(65)]
+    rng = random.Random(seed)
+    width = reader.columns
+    step = learning_rate
+    for epoch in range(epochs):
+        total = 0.0
+        for chunk in reader.chunks(chunk_rows, rng):
+            for start in range(0, len(chunk), width):
+                row = chunk[start:start + width].tolist()
+                tables = phases[phase_by_empties[int(row[0])]]
+                slots = [int(slot) for slot in row[LABEL_COLUMNS:]]
+                prediction = 0.0
+                for family, slot in zip(INSTANCE_FAMILY, slots):
+                    prediction += tables[family][slot]
+                error = row[1] - prediction
+                total += error * error
+                delta = step * error
+                for family, slot in zip(INSTANCE_FAMILY, slots):
+                    tables[family][slot] += delta
+        log(f"epoch {epoch + 1}: rms error {(total / reader.rows) ** 0.5 if reader.rows else 0.0:.3f}")
+    reader.close()
+    return phases
+
+
+def main():
+    from patterns import write_weights
+
+    parser = argparse.ArgumentParser(description="Train the evaluation weights from recorded positions.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    record = commands.add_parser("record", help="append self-play positions to a position file")
+    record.add_argument("positions")
+    record.add_argument("--games", type=int, default=1000)
+    record.add_argument("--name", default="Minimax-2", help="evaluation parameter set of the players")
+    record.add_argument("--depth", type=int, default=2, help="search depth of the players")
+    record.add_argument("--solve-empties", type=int, default=12, help="label positions this close to the end exactly")
+    record.add_argument("--seed", type=int, default=0)
+
+    extract = commands.add_parser("extract", help="build a feature matrix from a position file")
+    extract.add_argument("positions")
+    extract.add_argument("matrix")
+    extract.add_argument("--kind", choices=MATRIX_KINDS, default="features")
+
+    fit = commands.add_parser("fit", help="fit per-phase weights to a feature matrix")
+    fit.add_argument("matrix")
+    fit.add_argument("--kind", choices=MATRIX_KINDS, default="features")
+    fit.add_argument("--phases", type=int, default=4)
+    fit.add_argument("--name", default="Trained", help="parameter set to write (features)")
+    fit.add_argument("--ridge", type=float, default=1.0, help="L2 penalty (features)")
+    fit.add_argument("--epochs", type=int, default=3, help="SGD passes (patterns)")
+    fit.add_argument("--learning-rate", type=float, default=0.01, help="SGD step (patterns)")
+    fit.add_argument("--output", help="weight file (evaluation_weights.json or pattern_weights.bin by default)")
+    args = parser.parse_args()
+
+    if args.command == "record":
+        count = record_games(args.positions, args.games, args.name, args.depth, solve_empties=args.solve_empties,
+                             seed=args.seed)
+        print(f"wrote {count} positions to {args.positions}")
+    elif args.command == "extract":
+        count = extract_features(args.positions, args.matrix, args.kind)
+        print(f"wrote {count} rows to {args.matrix}")
+    elif args.kind == "features":
+        output = args.output or EVALUATION_WEIGHTS_PATH
+        phase_weights, errors, counts = fit_features(args.matrix, args.phases, args.ridge)
+        for phase, (weights, error, count) in enumerate(zip(phase_weights, errors, counts)):
+            print(f"phase {phase}: {count} positions, rms error {error:.3f} "
+                  + " ".join(f"{name}={value:.3f}" for name, value in weights.items()))
+        write_evaluation_weights(output, args.name, phase_weights, positions=sum(counts))
+        print(f"wrote {args.name} to {output}")
+    else:
+        output = args.output or PATTERN_WEIGHTS_PATH
+        write_weights(output, fit_patterns(args.matrix, args.phases, args.epochs, args.learning_rate))
+        print(f"wrote {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+"""
+Fixed-size transposition tables for the alpha-beta agent.
+"""
+from multiprocessing import shared_memory
+import struct
+
+EXACT = 0
+LOWER = 1  # fail-high: the true score is at least the stored score
+UPPER = 2  # fail-low: the true score is at most the stored score
+
+# Rough size of one slot (tuple + its ints/float) in CPython, used to turn MB into slots.
+ENTRY_BYTES = 128
+
+# Two slots of three 64-bit words per bucket in the shared table.
+SLOT_WORDS = 3
+SHARED_BUCKET_BYTES = 2 * SLOT_WORDS * 8
+NO_MOVE = 64
+# Set in the data word of every stored slot, so an empty slot (all zero) never matches.
+OCCUPIED = 1 << 32
+
+
+class TranspositionTable:
+    def __init__(self, size_mb=16):
+        """
+        A two-tier transposition table keyed by Zobrist hash.
+
+        Every index holds two slots: a depth-preferred slot that is only replaced by an
+        equal or deeper search (or by anything once its entry is from an older search),
+        and an always-replace slot that keeps the most recent entry. Entries are
+        ``(key, depth, score, bound, move, generation)`` tuples, where the generation is the
+        game ply of the search that stored them, so the table can be kept across moves.
+
+        Args:
+            size_mb (float): Approximate memory budget for the table, in megabytes.
+        """
+        slots = max(2, int(size_mb * 1024 * 1024) // ENTRY_BYTES)
+        buckets = 1 << ((slots // 2).bit_length() - 1)  # round down to a power of two
+        self.size_mb = size_mb
+        self.mask = buckets - 1
+        self.deep = [None] * buckets
+        self.recent = [None] * buckets
+        self.generation = 0
+        self.reset_stats()
+
+    def new_search(self, generation):
+        """
+        Start a new search: entries stored by earlier generations stay readable but become
+        replaceable regardless of their depth.
+
+        Args:
+            generation (int): The game ply of the new search (0-255).
+        """
+        self.generation = generation & 0xFF
+
+    def reset_stats(self):
+        """Zero the probe/hit/cutoff/collision/store counters."""
+        self.probes = 0
+        self.hits = 0
+        self.cutoffs = 0
+        self.collisions = 0
+        self.stores = 0
+
+    def stats(self):
+        """
+        Return the table counters.
+
+        Returns:
+            dict: probes, hits, cutoffs, collisions, stores and the hit rate.
+        """
+        return {
+            "probes": self.probes,
+            "hits": self.hits,
+            "cutoffs": self.cutoffs,
+            "collisions": self.collisions,
+            "stores": self.stores,
+            "hit_rate": self.hits / self.probes if self.probes else 0.0,
+        }
+
+    def clear(self):
+        """Drop every entry."""
+        self.deep = [None] * len(self.deep)
+        self.recent = [None] * len(self.recent)
+
+    def probe(self, key):
+        """
+        Look up a position.
+
+        Args:
+            key (int): The position's Zobrist hash.
+
+        Returns:
+            tuple: The ``(key, depth, score, bound, move, generation)`` entry, or None on a miss.
+        """
+        self.probes += 1
+        index = key & self.mask
+        entry = self.deep[index]
+        if entry is not None and entry[0] == key:
+            self.hits += 1
+            return entry
+        other = self.recent[index]
+        if other is not None and other[0] == key:
+            self.hits += 1
+            return other
+        if entry is not None or other is not None:
+            self.collisions += 1
+        return None
+
+    def store(self, key, depth, score, bound, move):
+        """
+        Store a search result, keeping the deepest entry of the current generation per index
+        in the depth-preferred slot and anything else in the always-replace slot.
+
+        Args:
+            key (int): The position's Zobrist hash.
+            depth (int): The remaining depth the score was searched to.
+            score (float): The search score.
+            bound (int): EXACT, LOWER or UPPER.
+            move (tuple): The best move found, or None.
+        """
+        self.stores += 1
+        index = key & self.mask
+        entry = (key, depth, score, bound, move, self.generation)
+        current = self.deep[index]
+        if current is None or current[0] == key or depth >= current[1] or current[5] != self.generation:
+            self.deep[index] = entry
+        else:
+            self.recent[index] = entry
+
+
+class SharedTranspositionTable(TranspositionTable):
+    def __init__(self, size_mb=16, name=None):
+        """
+        A lock-free transposition table in ``multiprocessing.shared_memory`` for Lazy SMP workers.
+
+        The table is a flat array of unsigned 64-bit words. Each bucket holds a depth-preferred and an
+        always-replace slot, and each slot is three words: ``key ^ data ^ score``, ``data`` and ``score``, where
+        ``data`` packs depth, bound, move and generation and ``score`` holds the bits of the float64 score, so
+        scores keep the full precision the search's null windows rely on. Readers only accept a slot whose words
+        XOR back to the probed key, so a slot torn by two processes writing at once reads as a miss. The generation is
+        local to each process (see ``new_search``), so every process must be told the current one.
+
+        Args:
+            size_mb (float): Approximate memory budget when creating the table, in megabytes.
+            name (str): Name of an existing table to attach to instead of creating one.
+        """
+        if name is None:
+            buckets = 1 << ((int(size_mb * 1024 * 1024) // SHARED_BUCKET_BYTES).bit_length() - 1)
+            self.shm = shared_memory.SharedMemory(create=True, size=buckets * SHARED_BUCKET_BYTES)
+            self.owner = True
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+            self.owner = False
+            buckets = 1 << ((self.shm.size // SHARED_BUCKET_BYTES).bit_length() - 1)
+        self.name = self.shm.name
+        self.size_mb = buckets * SHARED_BUCKET_BYTES / (1024 * 1024)
+        self.mask = buckets - 1
+        self.words = self.shm.buf.cast("Q")
+        self.reset_stats()
+
+    def close(self):
+        """Detach from the shared memory, and free it if this process created it."""
+        if self.words is None:
+            return
+        self.words.release()
+        self.words = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+    def clear(self):
+        """Drop every entry (for all processes sharing the table)."""
+        self.shm.buf[:] = bytes(len(self.shm.buf))
+
+    def probe(self, key):
+        """
+        Look up a position.
+
+        Args:
+            key (int): The position's Zobrist hash.
+
+        Returns:
+            tuple: The ``(key, depth, score, bound, move, generation)`` entry, or None on a miss.
+        """
+        self.probes += 1
+        words = self.words
+        slot = (key & self.mask) * 2 * SLOT_WORDS
+        occupied = False
+        for slot in (slot, slot + SLOT_WORDS):
+            data = words[slot + 1]
+            if data:
+                score_bits = words[slot + 2]
+                if words[slot] ^ data ^ score_bits == key:
+                    self.hits += 1
+                    return _unpack_entry(key, data, score_bits)
+                occupied = True
+        if occupied:
+            self.collisions += 1
+        return None
+
+    def store(self, key, depth, score, bound, move):
+        """
+        Store a search result with the same replacement policy as ``TranspositionTable.store``.
+
+        Args:
+            key (int): The position's Zobrist hash.
+            depth (int): The remaining depth the score was searched to.
+            score (float): The search score.
+            bound (int): EXACT, LOWER or UPPER.
+            move (tuple): The best move found, or None.
+        """
+        self.stores += 1
+        words = self.words
+        slot = (key & self.mask) * 2 * SLOT_WORDS
+        data, score_bits = _pack_entry(depth, score, bound, move, self.generation)
+        current = words[slot + 1]
+        if (
+            current
+            and words[slot] ^ current ^ words[slot + 2] != key
+            and depth < (current & 0xFF)
+            and (current >> 24) & 0xFF == self.generation
+        ):
+            slot += SLOT_WORDS
+        words[slot] = key ^ data ^ score_bits
+        words[slot + 1] = data
+        words[slot + 2] = score_bits
+
+
+def _pack_entry(depth, score, bound, move, generation):
+    square = NO_MOVE if move is None else move[0] * 8 + move[1]
+    score_bits = struct.unpack("<Q", struct.pack("<d", score))[0]
+    return OCCUPIED | generation << 24 | square << 16 | bound << 8 | depth, score_bits
+
+
+def _unpack_entry(key, data, score_bits):
+    square = (data >> 16) & 0xFF
+    score = struct.unpack("<d", struct.pack("<Q", score_bits))[0]
+    move = None if square == NO_MOVE else divmod(square, 8)
+    return key, data & 0xFF, score, (data >> 8) & 0xFF, move, (data >> 24) & 0xFF
@@ -0,0 +1,302 @@
+"""
+Genetic tuning of the alpha-beta agent's evaluation weights by self-play.
+
+Each individual is a weight vector: one value per evaluation feature (see
+``ai_agent_alphabeta.EVALUATION_FEATURES``) and game phase. Its fitness is its score (1 per win,
+1/2 per draw) against reference parameter sets over a fixed set of openings, each played once
+with either colour. The games of a generation run in parallel worker processes. Individuals
+keep their fitness across generations, the best ``elite`` survive unchanged, and the others
+are bred by tournament selection, blend crossover and Gaussian mutation.
+
+After every generation the whole state (population, fitness, openings, random generator) is
+written to a checkpoint, so an interrupted run resumes where it stopped, and the best vector
+so far is written to the trained weight file (see training.py) under ``--name``, where
+``ai_agent`` picks it up as an evaluation parameter set::
+
+    python weight_tuner.py --name Tuned --generations 20 --workers 4
+    # then: ai_agent().get_best_move(game, "Tuned")
+"""
+import argparse
+import json
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from training import EVALUATION_WEIGHTS_PATH, write_evaluation_weights
+
+CHECKPOINT_VERSION = 1
+# Name the candidate's parameter set is searched under in the worker processes.
+CANDIDATE = "Candidate"
+
+_worker_agents = None
+
+
+def _init_worker(agent_options):
+    global _worker_agents
+    from ai_agent_alphabeta import ai_agent
+
+    _worker_agents = (ai_agent(**agent_options), ai_agent(**agent_options))
+
+
+def _play_game(vector, phase_count, opponent, opening, candidate_color, depth):
+    """
+    Play one game between a weight vector and a named parameter set in a worker process.
+
+    Returns:
+        float: The candidate's result: 1 for a win, 0.5 for a draw, 0 for a loss.
+    """
+    from othello_game import OthelloGame
+
+    candidate, reference = _worker_agents
+    candidate.evaluation_params = dict(candidate.evaluation_params, **{CANDIDATE: to_params(vector, phase_count)})
+    for agent in _worker_agents:  # nothing learned in the previous game applies to this one
+        agent.tt.clear()
+        agent.reset_ordering()
+    game = OthelloGame.from_bits(*opening)
+    while not game.is_game_over():
+        if game.current_player == candidate_color:
+            move = candidate.get_best_move(game, CANDIDATE, max_depth=depth, time_budget=60.0)
+        else:
+            move = reference.get_best_move(game, opponent, max_depth=depth, time_budget=60.0)
+        game.make_move(*move)
+    winner = game.get_winner() * candidate_color
+    return 1.0 if winner > 0 else 0.5 if winner == 0 else 0.0
+
+
+def to_params(vector, phase_count):
+    """Turn a weight vector into an evaluation parameter set with per-phase weights."""
+    from ai_agent_alphabeta import EVALUATION_FEATURES
+
+    size = len(EVALUATION_FEATURES)
+    return {"phase_weights": [dict(zip(EVALUATION_FEATURES, vector[phase * size:(phase + 1) * size]))
+                              for phase in range(phase_count)]}
+
+
+def opening_positions(count, plies, seed):
+    """
+    Build a fixed opening set: ``count`` distinct positions reached by ``plies`` random moves.
+
+    Returns:
+        list: ``(black_bits, white_bits, player)`` tuples.
+    """
+    from othello_game import OthelloGame
+
+    rng = random.Random(seed)
+    openings = []
+    while len(openings) < count:
+        game = OthelloGame()
+        for _ in range(plies):
+            game.make_move(*rng.choice(game.get_valid_moves()))
+        opening = (game.black_bits, game.white_bits, game.current_player)
+        if opening not in openings:
+            openings.append(opening)
+    return openings
+
+
+class WeightTuner:
+    def __init__(self, checkpoint, population_size=12, phase_count=1, base="Minimax-2", opponents=("Minimax-2",),
+                 openings=8, opening_plies=6, depth=2, workers=1, elite=2, mutation_sigma=0.3, seed=0,
+                 agent_options=None):
+        """
+        A resumable genetic optimiser of evaluation weights.
+
+        Args:
+            checkpoint (str): State file; if it exists the run resumes from it, and the settings that define the
+                fitness (phases, opponents, openings, depth) are taken from it.
+            population_size (int): Weight vectors per generation.
+            phase_count (int): Game phases with their own weights.
+            base (str): Parameter set the first population is spread around.
+            opponents (tuple): Reference parameter sets every individual plays.
+            openings (int): Size of the fixed opening set.
+            opening_plies (int): Random moves of each opening.
+            depth (int): Search depth of both players.
+            workers (int): Number of processes playing games.
+            elite (int): Best individuals copied unchanged into the next generation.
+            mutation_sigma (float): Standard deviation of the mutation, relative to each weight's magnitude
+                (at least 1).
+            seed (int): Seed of the openings and of the random generator.
+            agent_options (dict): Extra keyword arguments for the ai_agents playing the games.
+        """
+        from ai_agent_alphabeta import EVALUATION_FEATURES, ai_agent
+
+        self.checkpoint = checkpoint
+        self.opponents = list(opponents)
+        self.depth = depth
+        self.workers = workers
+        self.elite = elite
+        self.mutation_sigma = mutation_sigma
+        self.agent_options = dict(
+            {"tt_size_mb": 4, "opening_book": None, "endgame_empties": 8, "wld_empties": 10}, **(agent_options or {})
+        )
+        self.executor = None
+        if os.path.exists(checkpoint):
+            self.load()
+            return
+        self.rng = random.Random(seed)
+        self.phase_count = phase_count
+        self.generation = 0
+        self.openings = opening_positions(openings, opening_plies, seed)
+        base_params = ai_agent(**self.agent_options).evaluation_params[base]
+        base_vector = [base_params[name] for name in EVALUATION_FEATURES] * phase_count
+        self.population = [base_vector] + [self.mutate(base_vector) for _ in range(population_size - 1)]
+        self.fitness = {}
+
+    def close(self):
+        """Shut down the worker processes."""
+        if self.executor is not None:
+            self.executor.shutdown(cancel_futures=True)
+            self.executor = None
+
+    def load(self):
+        with open(self.checkpoint, "r", encoding="utf-8") as f:
+            state = json.load(f)
+        if state.get("version") != CHECKPOINT_VERSION:
+            raise ValueError(f"{self.checkpoint} is not a version {CHECKPOINT_VERSION} tuner checkpoint")
+        self.phase_count = state["phase_count"]
+        self.opponents = state["opponents"]
+        self.depth = state["depth"]
+        self.generation = state["generation"]
+        self.openings = [tuple(opening) for opening in state["openings"]]
+        self.population = state["population"]
+        self.fitness = {tuple(vector): score for vector, score in state["fitness"]}
+        self.rng = random.Random()
+        version, internal, gauss_next = state["rng"]
+        self.rng.setstate((version, tuple(internal), gauss_next))
+
+    def save(self):
+        """Write the state to the checkpoint atomically."""
+        state = {
+            "version": CHECKPOINT_VERSION,
+            "phase_count": self.phase_count,
+            "opponents": self.opponents,
+            "depth": self.depth,
+            "generation": self.generation,
+            "openings": self.openings,
+            "population": self.population,
+            "fitness": [[list(vector), score] for vector, score in self.fitness.items()],
+            "rng": self.rng.getstate(),
+        }
+        temporary = self.checkpoint + ".tmp"
+        with open(temporary, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        os.replace(temporary, self.checkpoint)
+
+    def mutate(self, vector):
+        """Add Gaussian noise, scaled to each weight's magnitude, to every weight."""
+        return [value + self.rng.gauss(0.0, self.mutation_sigma * max(abs(value), 1.0)) for value in vector]
+
+    def crossover(self, parent1, parent2):
+        """Blend crossover: every weight is drawn between (and a little beyond) the parents' values."""
+        child = []
+        for a, b in zip(parent1, parent2):
+            low, high = min(a, b), max(a, b)
+            spread = 0.25 * (high - low)
+            child.append(self.rng.uniform(low - spread, high + spread))
+        return child
+
+    def select(self, ranked):
+        """Tournament selection of size 3 over the ranked population."""
+        return min(self.rng.sample(range(len(ranked)), min(3, len(ranked))))
+
+    def evaluate_population(self):
+        """
+        Score every individual without a fitness yet by playing its games in the worker processes.
+
+        Returns:
+            int: Number of games played.
+        """
+        pending = [vector for vector in dict.fromkeys(map(tuple, self.population)) if vector not in self.fitness]
+        games = [
+            (vector, self.phase_count, opponent, opening, color, self.depth)
+            for vector in pending
+            for opponent in self.opponents
+            for opening in self.openings
+            for color in (1, -1)
+        ]
+        if not games:
+            return 0
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(
+                max_workers=self.workers, initializer=_init_worker, initargs=(self.agent_options,)
+            )
+        results = self.executor.map(_play_game, *zip(*games), chunksize=max(1, len(games) // (4 * self.workers)))
+        scores = {}
+        for (vector, *_), result in zip(games, results):
+            scores[vector] = scores.get(vector, 0.0) + result
+        games_each = 2 * len(self.opponents) * len(self.openings)
+        for vector in pending:
+            self.fitness[vector] = scores[vector] / games_each
+        return len(games)
+
+    def step(self):
+        """
+        Evaluate the current generation and breed the next one.
+
+        Returns:
+            tuple: ``(best vector, its fitness, games played)`` of the evaluated generation.
+        """
+        games = self.evaluate_population()
+        ranked = sorted(dict.fromkeys(map(tuple, self.population)), key=self.fitness.get, reverse=True)
+        next_generation = [list(vector) for vector in ranked[:self.elite]]
+        while len(next_generation) < len(self.population):
+            parent1 = ranked[self.select(ranked)]
+            parent2 = ranked[self.select(ranked)]
+            next_generation.append(self.mutate(self.crossover(parent1, parent2)))
+        self.population = next_generation
+        self.generation += 1
+        return list(ranked[0]), self.fitness[ranked[0]], games
+
+    def best(self):
+        """Return the best vector evaluated so far and its fitness."""
+        vector = max(self.fitness, key=self.fitness.get)
+        return list(vector), self.fitness[vector]
+
+    def run(self, generations, name, output=EVALUATION_WEIGHTS_PATH, log=print):
+        """
+        Run until ``generations`` generations have been evaluated, checkpointing and writing the best vector as
+        parameter set ``name`` after each one.
+
+        Returns:
+            tuple: The best vector and its fitness.
+        """
+        while self.generation < generations:
+            start = time.perf_counter()
+            _, fitness, games = self.step()
+            self.save()
+            vector, best_fitness = self.best()
+            write_evaluation_weights(output, name, to_params(vector, self.phase_count)["phase_weights"],
+                                     generations=self.generation, fitness=best_fitness, opponents=self.opponents,
+                                     games_per_individual=2 * len(self.opponents) * len(self.openings))
+            log(f"generation {self.generation}: {games} games in {time.perf_counter() - start:.1f} s, "
+                f"best of generation {fitness:.3f}, best overall {best_fitness:.3f}")
+        return self.best()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tune evaluation weights by self-play with a genetic algorithm.")
+    parser.add_argument("--name", default="Tuned", help="parameter set to write")
+    parser.add_argument("--generations", type=int, default=20, help="generations to run in total")
+    parser.add_argument("--population", type=int, default=12)
+    parser.add_argument("--phases", type=int, default=1, help="game phases with their own weights")
+    parser.add_argument("--base", default="Minimax-2", help="parameter set to start from")
+    parser.add_argument("--opponent", action="append", help="reference parameter set (repeatable)")
+    parser.add_argument("--openings", type=int, default=8, help="size of the fixed opening set")
+    parser.add_argument("--depth", type=int, default=2, help="search depth of the games")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--checkpoint", default="weight_tuner_checkpoint.json")
+    parser.add_argument("--output", default=EVALUATION_WEIGHTS_PATH)
+    args = parser.parse_args()
+
+    tuner = WeightTuner(args.checkpoint, args.population, args.phases, args.base, args.opponent or ["Minimax-2"],
+                        args.openings, depth=args.depth, workers=args.workers, seed=args.seed)
+    try:
+        vector, fitness = tuner.run(args.generations, args.name, args.output)
+    finally:
+        tuner.close()
+    print(f"wrote {args.name} (fitness {fitness:.3f}) to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""
+Zobrist keys for OthelloGame positions.
+
+The key of a position is the XOR of one random 64-bit number per occupied square
+and colour, plus ``SIDE_KEY`` when White is to move. Moves update it incrementally:
+placing a disc XORs its colour key and flipping a disc XORs ``FLIP_KEYS`` (the
+black and white keys of that square combined).
+"""
+import random
+
+from bitboard import iter_squares
+
+_rng = random.Random(0x0DE110)
+
+BLACK_KEYS = [_rng.getrandbits(64) for _ in range(64)]
+WHITE_KEYS = [_rng.getrandbits(64) for _ in range(64)]
+FLIP_KEYS = [b ^ w for b, w in zip(BLACK_KEYS, WHITE_KEYS)]
+SIDE_KEY = _rng.getrandbits(64)
+
+
+def compute_hash(black_bits, white_bits, current_player):
+    """
+    Compute the Zobrist key of a position from scratch.
+
+    Args:
+        black_bits (int): Bitboard of the black discs.
+        white_bits (int): Bitboard of the white discs.
+        current_player (int): The side to move (1 for Black, -1 for White).
+
+    Returns:
+        int: The 64-bit key.
+    """
+    key = SIDE_KEY if current_player == -1 else 0
+    for square in iter_squares(black_bits):
+        key ^= BLACK_KEYS[square]
+    for square in iter_squares(white_bits):
+        key ^= WHITE_KEYS[square]
+    return key
+
+
+def flip_key(flipped):
+    """Return the key delta for flipping every disc in the ``flipped`` bitboard."""
+    key = 0
+    for square in iter_squares(flipped):
+        key ^= FLIP_KEYS[square]
+    return key